@@ -0,0 +1,76 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from recipes.versions import get_table_versions
+
+RESPONSE_KEY = 'response:{digest}'
+
+
+class LRUCache:
+    """Потокобезопасный LRU кэш в памяти процесса."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                return default
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+local_cache = LRUCache(settings.RESPONSE_CACHE_LOCAL_SIZE)
+
+
+def get_versions(models):
+    """
+    Возвращает общий токен версий таблиц models и время их последнего
+    изменения. Версии читаются из общего кэша на каждый запрос, чтобы
+    изменение в любом процессе сразу меняло ETag.
+    """
+
+    versions = get_table_versions(models)
+    return (
+        ':'.join(token for token, _ in versions),
+        max(modified for _, modified in versions)
+    )
+
+
+def make_etag(token, path):
+    digest = hashlib.md5(f'{token}:{path}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def get_response_content(etag):
+    """Ищет тело ответа сначала в памяти процесса, затем в общем кэше."""
+
+    key = RESPONSE_KEY.format(digest=etag.strip('"'))
+    content = local_cache.get(key)
+    if content is None:
+        content = cache.get(key)
+        if content is not None:
+            local_cache.set(key, content)
+    return content
+
+
+def set_response_content(etag, content):
+    key = RESPONSE_KEY.format(digest=etag.strip('"'))
+    local_cache.set(key, content)
+    cache.set(key, content, settings.RESPONSE_CACHE_TIMEOUT)
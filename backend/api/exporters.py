@@ -0,0 +1,105 @@
+import csv
+import io
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+
+class ShoppingListExporter(ABC):
+    """
+    Базовый класс для выгрузки списка покупок.
+    render принимает итератор строк (название, единица, количество)
+    и возвращает итератор байтов готового файла.
+    """
+
+    format = None
+    content_type = None
+
+    @abstractmethod
+    def render(self, rows):
+        """Итератор байтов файла со строками rows."""
+
+    @property
+    def filename(self):
+        return f'shopping_cart.{self.format}'
+
+
+class TxtExporter(ShoppingListExporter):
+    format = 'txt'
+    content_type = 'text/plain; charset=utf-8'
+
+    def render(self, rows):
+        for name, unit, amount in rows:
+            yield f'{name} ({unit}) - {amount}\n'.encode()
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class CsvExporter(ShoppingListExporter):
+    format = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+    header = ('Ингредиент', 'Единица измерения', 'Количество')
+
+    def render(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.header).encode('utf-8-sig')
+        for row in rows:
+            yield writer.writerow(row).encode()
+
+
+class PdfExporter(ShoppingListExporter):
+    format = 'pdf'
+    content_type = 'application/pdf'
+    title = 'Список покупок'
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    margin = 50
+    line_height = 18
+
+    def get_font(self):
+        if self.font_name in pdfmetrics.getRegisteredFontNames():
+            return self.font_name
+        try:
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_LIST_PDF_FONT)
+            )
+        except Exception:
+            return 'Helvetica'
+        return self.font_name
+
+    def render(self, rows):
+        font = self.get_font()
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        pdf.setTitle(self.title)
+        pdf.setFont(font, self.font_size + 4)
+        pdf.drawString(self.margin, height - self.margin, self.title)
+        pdf.setFont(font, self.font_size)
+        y = height - self.margin - self.line_height * 2
+        for number, (name, unit, amount) in enumerate(rows, start=1):
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(font, self.font_size)
+                y = height - self.margin
+            pdf.drawString(
+                self.margin, y, f'{number}. {name} ({unit}) - {amount}'
+            )
+            y -= self.line_height
+        pdf.save()
+        yield buffer.getvalue()
+
+
+EXPORTERS = {
+    exporter.format: exporter
+    for exporter in (TxtExporter, CsvExporter, PdfExporter)
+}
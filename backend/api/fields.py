@@ -0,0 +1,63 @@
+import io
+
+from django.conf import settings
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from recipes.images import THUMBNAIL_FORMATS, get_storage
+from rest_framework import serializers
+
+
+class RecipeImageField(Base64ImageField):
+    """
+    Base64ImageField с ограничением размера и разрешения изображения.
+    Размер проверяется до декодирования base64, разрешение - по
+    заголовку файла до декодирования пикселей.
+    """
+
+    def to_internal_value(self, base64_data):
+        max_size = settings.RECIPE_IMAGE_MAX_SIZE
+        if isinstance(base64_data, str) and len(base64_data) > (
+            max_size * 4 // 3 + 100
+        ):
+            raise serializers.ValidationError(
+                f'Размер изображения не должен превышать '
+                f'{max_size // (1024 * 1024)} МБ'
+            )
+        return super().to_internal_value(base64_data)
+
+    def get_file_extension(self, filename, decoded_file):
+        try:
+            with Image.open(io.BytesIO(decoded_file)) as image:
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        max_dimension = settings.RECIPE_IMAGE_MAX_DIMENSION
+        if max(width, height) > max_dimension:
+            raise serializers.ValidationError(
+                f'Разрешение изображения не должно превышать '
+                f'{max_dimension}x{max_dimension}'
+            )
+        return super().get_file_extension(filename, decoded_file)
+
+
+class ImageThumbnailsField(serializers.ReadOnlyField):
+    """
+    Ссылки на миниатюры изображения рецепта:
+    {"webp": {"320": url, ...}, "jpeg": {...}}.
+    Пока миниатюры не созданы, возвращает пустой словарь.
+    """
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        storage = get_storage()
+        thumbnails = {}
+        for extension in THUMBNAIL_FORMATS:
+            if extension not in value:
+                continue
+            thumbnails[extension] = {}
+            for width, name in value[extension].items():
+                url = storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                thumbnails[extension][width] = url
+        return thumbnails
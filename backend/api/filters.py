@@ -1,29 +1,93 @@
+from django import forms
 from django_filters.rest_framework import FilterSet, filters
+from recipes.ingredient_sets import filter_by_ingredients
 from recipes.models import Recipe
-from rest_framework.filters import SearchFilter
+from recipes.scores import order_by_score
+from recipes.search import search_recipes
+from recipes.tags import filter_by_tags
 
 
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
+class MultipleValueField(forms.Field):
+    """Поле для повторяющегося параметра запроса: ?tags=a&tags=b."""
+
+    widget = forms.SelectMultiple
+
+    def to_python(self, value):
+        if not value:
+            return []
+        return [str(item) for item in value]
+
+
+class TagsFilter(filters.Filter):
+    """
+    Фильтр по слагам тэгов. Слаги переводятся в id по словарю тэгов
+    в памяти, рецепты отбираются одним подзапросом EXISTS.
+    Режим задаётся параметром tags_mode: any (по умолчанию) или all.
+    """
+
+    field_class = MultipleValueField
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        match_all = self.parent.form.cleaned_data.get('tags_mode') == 'all'
+        return filter_by_tags(qs, value, match_all=match_all)
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Список чисел через запятую: ?have=1,2,3."""
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    TAGS_MODES = (
+        ('any', 'любой из тэгов'),
+        ('all', 'все тэги')
+    )
+    ORDERINGS = (
+        ('popular', 'популярные'),
+        ('trending', 'набирающие популярность')
+    )
+
+    tags = TagsFilter()
+    tags_mode = filters.ChoiceFilter(
+        choices=TAGS_MODES, method='filter_tags_mode'
+    )
+    author = filters.NumberFilter(field_name='author_id')
+    search = filters.CharFilter(method='filter_search')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    # после остальных фильтров: ранжируются только отобранные рецепты,
+    # порядок ?search= сохраняется при равном числе недостающих
+    # ингредиентов; ?ordering= применяется последним и заменяет порядок
+    have = NumberInFilter(method='filter_have')
+    ordering = filters.ChoiceFilter(
+        choices=ORDERINGS, method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
 
+    def filter_tags_mode(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_have(self, queryset, name, value):
+        return filter_by_ingredients(queryset, value)
+
     def filter_is_favorited(self, queryset, name, value):
         if value:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value:
-            return queryset.filter(shopping_cart__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
         return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        return order_by_score(queryset, value)
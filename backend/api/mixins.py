@@ -1,8 +1,16 @@
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from recipes.models import Favorite, Recipe, ShoppingCart
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from recipes.models import Favorite, IngredientMount, Recipe, ShoppingCart, Tag
 from rest_framework import status
 from rest_framework.response import Response
+from users.models import Follow
 
+from .cache import (get_response_content, get_versions, make_etag,
+                    set_response_content)
+from .pagination import NewCursorPagination
 from .serializers import FavoriteSerializer, ShoppingCartSerializer
 
 
@@ -39,3 +47,151 @@ class RecipePostDeleteMixin:
             )
         obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class VersionedCacheMixin:
+    """
+    Миксин для кэширования JSON ответов list и retrieve.
+    Тело ответа хранится в кэше под ключом, зависящим от версий таблиц
+    cache_models и пути запроса. Версии меняются сигналами post_save и
+    post_delete. Отдаёт ETag и Last-Modified и отвечает 304 на условные
+    GET запросы без обращения к БД.
+    """
+
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+        token, modified = get_versions(self.cache_models)
+        etag = make_etag(token, request.get_full_path())
+        last_modified = int(modified)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        content = get_response_content(etag)
+        if content is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context()
+            )
+            set_response_content(etag, content)
+        response = HttpResponse(content, content_type=renderer.media_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Миксин для условных GET запросов к list и retrieve.
+    get_validators возвращает пару (токен, время изменения) или None.
+    Если If-None-Match или If-Modified-Since совпадают с валидаторами,
+    отвечает 304 без сериализации ответа.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validators(self):
+        """
+        Возвращает пару (токен, время изменения) для ETag и Last-Modified.
+        Переопределяется в представлении; по умолчанию None, и ответ
+        отдаётся без условной обработки.
+        """
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        token, modified = validators
+        etag = make_etag(token, request.get_full_path())
+        last_modified = int(modified)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CursorPaginationMixin:
+    """
+    Миксин для пагинации по курсору при запросе с ?pagination=cursor.
+    Без параметра используется pagination_class представления.
+    """
+
+    cursor_pagination_class = NewCursorPagination
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, '_paginator')
+            and self.request.query_params.get('pagination') == 'cursor'
+        ):
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+
+class RecipeQuerysetMixin:
+    """Миксин для представлений, отдающих рецепты через RecipeGetSerializer."""
+
+    def get_queryset(self):
+        """
+        Возвращает рецепты вместе с автором, тэгами, ингредиентами и
+        флагами is_favorited, is_in_shopping_cart, author_is_subscribed.
+        Количество запросов к БД не зависит от размера страницы.
+        """
+
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientMount.objects.select_related('ingredient')
+            )
+        )
+        user = self.request.user
+        if user.is_anonymous:
+            false = Value(False, output_field=BooleanField())
+            return queryset.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                author_is_subscribed=false
+            )
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            author_is_subscribed=Exists(Follow.objects.filter(
+                user=user, following=OuterRef('author')
+            ))
+        )
@@ -0,0 +1,12 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class IgnoreFormatContentNegotiation(DefaultContentNegotiation):
+    """
+    Выбирает рендерер только по заголовку Accept, не используя параметр
+    запроса format. Нужен для endpoints, где format означает формат
+    выгружаемого файла, а не формат ответа API.
+    """
+
+    def filter_renderers(self, renderers, format):
+        return renderers
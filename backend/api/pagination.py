@@ -1,6 +1,111 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from recipes.versions import get_table_versions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+
+COUNT_KEY = 'pagination_count:{digest}'
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор, кэширующий COUNT(*) по тексту запроса и версии таблиц,
+    от которых зависит результат.
+    """
+
+    def __init__(self, object_list, per_page, version='', **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.version = version
+
+    @cached_property
+    def count(self):
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        digest = hashlib.md5(
+            f'{self.version}:{sql}:{params}'.encode()
+        ).hexdigest()
+        key = COUNT_KEY.format(digest=digest)
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
 
 
 class NewPageNumberPagination(PageNumberPagination):
+    """
+    Пагинация по номеру страницы. Если у представления задан
+    count_models, общее количество объектов кэшируется до изменения
+    любой из этих таблиц.
+    """
+
+    page_size = 6
+    page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        count_models = getattr(view, 'count_models', ())
+        if count_models:
+            self.django_paginator_class = partial(
+                CachedCountPaginator,
+                version=':'.join(
+                    token for token, _ in get_table_versions(count_models)
+                )
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class NewCursorPagination(CursorPagination):
+    """
+    Пагинация по курсору по убыванию id: без COUNT(*) и OFFSET,
+    время выдачи страницы не зависит от её номера.
+    """
+
     page_size = 6
     page_size_query_param = 'limit'
+    ordering = '-id'
+
+
+class FeedCursorPagination(NewCursorPagination):
+    """
+    Пагинация ленты по курсору: позиция курсора - id последнего рецепта
+    страницы. id рецептов страницы возвращает метод представления
+    get_page_ids(before, limit). Переход назад не поддерживается.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        before = None
+        if cursor is not None and cursor.position is not None:
+            try:
+                before = int(cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+        ids = view.get_page_ids(before, self.page_size + 1)
+        self.has_next = len(ids) > self.page_size
+        ids = ids[:self.page_size]
+        self.has_previous = False
+        self.next_position = str(ids[-1]) if ids else None
+        if not ids:
+            return []
+        return list(queryset.filter(id__in=ids).order_by('-id'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False, position=self.next_position
+        ))
+
+    def get_previous_link(self):
+        return None
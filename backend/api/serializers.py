@@ -1,10 +1,14 @@
 from django.core.validators import MinValueValidator
-from drf_extra_fields.fields import Base64ImageField
+from django.db import connection, transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from recipes.models import (Favorite, Ingredient, IngredientMount, Recipe,
                             ShoppingCart, Tag)
+from recipes.signals import recipe_updated, recipes_created
 from rest_framework import serializers
 from users.serializers import CheckRequestMixin, CustomUserSerializer
 
+from .fields import ImageThumbnailsField, RecipeImageField
+
 
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор для работы с моделью Tag."""
@@ -59,9 +63,7 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
     запросах к моделе Recipe.
     """
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(validators=[MinValueValidator(1), ])
 
     class Meta:
@@ -80,6 +82,7 @@ class RecipeGetSerializer(serializers.ModelSerializer, CheckRequestMixin):
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_thumbnails = ImageThumbnailsField()
 
     class Meta:
         model = Recipe
@@ -92,27 +95,133 @@ class RecipeGetSerializer(serializers.ModelSerializer, CheckRequestMixin):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_thumbnails',
             'text',
-            'cooking_time'
+            'cooking_time',
+            'favorites_count',
+            'in_carts_count'
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
-        self.good_request(request)
+        if not self.good_request(request):
+            return False
         return request.user.favorites.filter(recipe=obj).exists()
 
     def get_ingredients(self, obj):
-        ingredients = IngredientMount.objects.filter(recipe=obj)
-        return IngredientMountSerializer(ingredients, many=True).data
+        return IngredientMountSerializer(
+            obj.recipe_ingredients.all(), many=True
+        ).data
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
-        self.good_request(request)
+        if not self.good_request(request):
+            return False
         return ShoppingCart.objects.filter(
             user=request.user,
             recipe=obj
         ).exists()
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
+
+def get_existing_ids(model, ids):
+    return set(model.objects.filter(id__in=ids).values_list('id', flat=True))
+
+
+def parse_ids(values):
+    return {
+        int(value) for value in values
+        if isinstance(value, int)
+        or isinstance(value, str) and value.isdigit()
+    }
+
+
+def build_recipe_ingredients(recipe, ingredients):
+    return [
+        IngredientMount(
+            ingredient_id=ingredient['id'],
+            recipe=recipe,
+            amount=ingredient['amount']
+        ) for ingredient in ingredients
+    ]
+
+
+class RecipeBulkListSerializer(serializers.ListSerializer):
+    """
+    Сериализатор для создания нескольких рецептов одним запросом.
+    Существование ингредиентов и тэгов всех рецептов проверяется
+    двумя запросами, рецепты, ингредиенты и тэги сохраняются через
+    bulk_create. Вместо post_save для каждого рецепта отправляется
+    один сигнал recipes_created.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            recipes = [recipe for recipe in data if isinstance(recipe, dict)]
+            self._context['existing_ingredients'] = get_existing_ids(
+                Ingredient, parse_ids(
+                    ingredient.get('id')
+                    for recipe in recipes
+                    for ingredient in recipe.get('ingredients') or []
+                    if isinstance(ingredient, dict)
+                )
+            )
+            self._context['existing_tags'] = get_existing_ids(Tag, parse_ids(
+                tag for recipe in recipes for tag in recipe.get('tags') or []
+            ))
+        return super().to_internal_value(data)
+
+    def bulk_create_recipes(self, recipes):
+        """
+        Сохраняет рецепты одним bulk_create. БД, которые не возвращают
+        id из bulk_create, пишут в транзакции последовательно, поэтому
+        id берутся по порядку после последнего id до вставки.
+        """
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            return Recipe.objects.bulk_create(recipes)
+        last_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        Recipe.objects.bulk_create(recipes)
+        created_ids = Recipe.objects.filter(id__gt=last_id).order_by(
+            'id'
+        ).values_list('id', flat=True)
+        for recipe, recipe_id in zip(recipes, created_ids):
+            recipe.id = recipe_id
+        return recipes
+
+    @transaction.atomic
+    def create(self, validated_data):
+        relations = [
+            (attrs.pop('tags'), attrs.pop('ingredients'))
+            for attrs in validated_data
+        ]
+        recipes = self.bulk_create_recipes(
+            [Recipe(**attrs) for attrs in validated_data]
+        )
+        recipe_ingredients = []
+        recipe_tags = []
+        for recipe, (tags, ingredients) in zip(recipes, relations):
+            recipe_ingredients.extend(
+                build_recipe_ingredients(recipe, ingredients)
+            )
+            recipe_tags.extend(
+                Recipe.tags.through(recipe=recipe, tag_id=tag) for tag in tags
+            )
+        IngredientMount.objects.bulk_create(recipe_ingredients)
+        Recipe.tags.through.objects.bulk_create(recipe_tags)
+        recipes_created.send(sender=Recipe, instances=recipes)
+        return recipes
+
 
 class RecipePostSerializer(serializers.ModelSerializer):
     """
@@ -120,12 +229,9 @@ class RecipePostSerializer(serializers.ModelSerializer):
     """
 
     author = CustomUserSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     ingredients = IngredientAmountSerializer(many=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
@@ -138,18 +244,29 @@ class RecipePostSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time'
         )
+        list_serializer_class = RecipeBulkListSerializer
 
     def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        tags = self.initial_data.get('tags')
-        self.validate_unic(ingredients, tags)
-        cooking_time = self.initial_data.get('cooking_time')
-        if int(cooking_time) <= 0:
+        self.validate_unic(
+            data.get('ingredients', []), data.get('tags', [])
+        )
+        cooking_time = data.get('cooking_time')
+        if cooking_time is not None and cooking_time <= 0:
             raise serializers.ValidationError(
                 {'cooking_time': 'Время приготовления должно быть больше 0'}
             )
         return data
 
+    def check_existing(self, model, ids, context_key, message):
+        existing = self.context.get(context_key)
+        if existing is None:
+            existing = get_existing_ids(model, ids)
+        missing = set(ids) - existing
+        if missing:
+            raise serializers.ValidationError(
+                f'{message}: {", ".join(map(str, sorted(missing)))}'
+            )
+
     def validate_ingredients(self, ingredients):
         if len(ingredients) <= 0:
             raise serializers.ValidationError(
@@ -160,6 +277,12 @@ class RecipePostSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     'Колличество ингредиентов должно быть больше 0'
                 )
+        self.check_existing(
+            Ingredient,
+            [ingredient['id'] for ingredient in ingredients],
+            'existing_ingredients',
+            'Ингредиенты не найдены'
+        )
         return ingredients
 
     def validate_tags(self, tags):
@@ -167,16 +290,19 @@ class RecipePostSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {'tags': 'Укажите хотя бы один тег в рецепте'}
             )
+        self.check_existing(
+            Tag, tags, 'existing_tags', 'Тэги не найдены'
+        )
         return tags
 
     def validate_unic(self, ingredients, tags):
         ingredients_list = []
         for ingredient in ingredients:
-            if ingredient in ingredients_list:
+            if ingredient['id'] in ingredients_list:
                 raise serializers.ValidationError(
                     {'ingredients': 'Ингредиент должен быть уникальным'}
                 )
-            ingredients_list.append(ingredient)
+            ingredients_list.append(ingredient['id'])
         tags_list = []
         for tag in tags:
             if tag in tags_list:
@@ -185,48 +311,123 @@ class RecipePostSerializer(serializers.ModelSerializer):
                 )
             tags_list.append(tag)
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
-        for tag in tags:
-            recipe.tags.add(tag)
-        for ingredient in ingredients:
-            IngredientMount.objects.create(
-                ingredient=ingredient['id'],
-                recipe=recipe,
-                amount=ingredient['amount']
-            )
+        recipe.tags.set(tags)
+        IngredientMount.objects.bulk_create(
+            build_recipe_ingredients(recipe, ingredients)
+        )
         return recipe
 
+    def update_fields(self, instance, validated_data):
+        changed = []
+        for field in ('name', 'text', 'cooking_time'):
+            value = validated_data.get(field, getattr(instance, field))
+            if value != getattr(instance, field):
+                setattr(instance, field, value)
+                changed.append(field)
+        if validated_data.get('image') is not None:
+            instance.image = validated_data['image']
+            changed.append('image')
+        return changed
+
+    def update_tags(self, instance, tags):
+        current = set(instance.tags.values_list('id', flat=True))
+        added = set(tags) - current
+        removed = current - set(tags)
+        if removed:
+            instance.tags.through.objects.filter(
+                recipe=instance, tag_id__in=removed
+            ).delete()
+        if added:
+            instance.tags.through.objects.bulk_create(
+                instance.tags.through(recipe=instance, tag_id=tag)
+                for tag in added
+            )
+        return {'added': added, 'removed': removed}
+
+    def update_ingredients(self, instance, ingredients):
+        current = {
+            mount.ingredient_id: mount
+            for mount in instance.recipe_ingredients.all()
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        added = {
+            ingredient_id: amount for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        }
+        removed = {
+            ingredient_id: mount.amount
+            for ingredient_id, mount in current.items()
+            if ingredient_id not in amounts
+        }
+        updated = {
+            ingredient_id: (mount.amount, amounts[ingredient_id])
+            for ingredient_id, mount in current.items()
+            if ingredient_id in amounts
+            and mount.amount != amounts[ingredient_id]
+        }
+        if removed:
+            IngredientMount.objects.filter(
+                id__in=[current[ingredient_id].id for ingredient_id in removed]
+            ).delete()
+        if updated:
+            mounts = [current[ingredient_id] for ingredient_id in updated]
+            for mount in mounts:
+                mount.amount = amounts[mount.ingredient_id]
+            IngredientMount.objects.bulk_update(mounts, ['amount'])
+        if added:
+            IngredientMount.objects.bulk_create(
+                IngredientMount(
+                    recipe=instance, ingredient_id=ingredient_id, amount=amount
+                ) for ingredient_id, amount in added.items()
+            )
+        return {'added': added, 'updated': updated, 'removed': removed}
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.image = validated_data.get('image', instance.image)
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time',
-            instance.cooking_time
-        )
-        instance.tags.clear()
-        tags = validated_data.get('tags')
-        for tag in tags:
-            instance.tags.add(tag)
-        instance.recipe_ingredients.filter(recipe=instance).all().delete()
-        ingredients = validated_data.get('ingredients')
-        IngredientMount.objects.bulk_create(
-            [IngredientMount(
-                ingredient=ingredient['id'],
-                recipe=instance,
-                amount=ingredient['amount']
-            ) for ingredient in ingredients
-            ]
+        """
+        Обновляет только изменившиеся поля, тэги и ингредиенты рецепта.
+        При любом изменении обновляется updated_at.
+        Изменения передаются в сигнале recipe_updated.
+        """
+
+        changes = {'fields': self.update_fields(instance, validated_data)}
+        if validated_data.get('tags') is not None:
+            changes['tags'] = self.update_tags(
+                instance, validated_data['tags']
+            )
+        if validated_data.get('ingredients') is not None:
+            changes['ingredients'] = self.update_ingredients(
+                instance, validated_data['ingredients']
+            )
+        if changes['fields'] or any(
+            any(changes.get(part, {}).values())
+            for part in ('tags', 'ingredients')
+        ):
+            instance.save(update_fields=changes['fields'] + ['updated_at'])
+        recipe_updated.send(
+            sender=Recipe, instance=instance, changes=changes
         )
-        instance.save()
         return instance
 
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientMount.objects.select_related('ingredient')
+            )
+        )
         return RecipeGetSerializer(
             instance, context=context
         ).data
@@ -238,12 +439,15 @@ class RecipeRepresentationSerializer(serializers.ModelSerializer):
     при POST запросах к моделям ShoppingCart, Favorite.
     """
 
+    image_thumbnails = ImageThumbnailsField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'image_thumbnails',
             'cooking_time'
         )
 
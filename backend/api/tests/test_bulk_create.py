@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from recipes.models import FeedItem, Ingredient, RecipeScore, Tag
+from rest_framework.authtoken.models import Token
+from users.models import Follow, User
+
+from .test_query_budgets import TEST_CACHES
+
+MEDIA_ROOT = tempfile.mkdtemp()
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1Pe'
+    'AAAADElEQVR4nGP4z8AAAAMBAQDJ/pLvAAAAAElFTkSuQmCC'
+)
+
+
+@override_settings(CACHES=TEST_CACHES, MEDIA_ROOT=MEDIA_ROOT)
+class RecipeBulkCreateTests(TestCase):
+    """Побочные эффекты создания рецептов через /api/recipes/bulk/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='author'
+        )
+        cls.follower = User.objects.create_user(
+            username='follower', email='follower@example.com',
+            password='follower'
+        )
+        Follow.objects.create(user=cls.follower, following=cls.author)
+        cls.token = Token.objects.create(user=cls.author)
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.tag = Tag.objects.create(
+            name='Завтрак', slug='breakfast', color='#FFA500'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_side_effects_for_every_recipe(self):
+        data = [{
+            'name': f'блины {number}', 'text': 'блины', 'cooking_time': 10,
+            'image': IMAGE, 'tags': [self.tag.id],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 5}]
+        } for number in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/recipes/bulk/', data, content_type='application/json',
+                HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+        self.assertEqual(response.status_code, 201)
+        recipe_ids = {recipe['id'] for recipe in response.json()}
+        self.assertEqual(len(recipe_ids), len(data))
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, len(data))
+        self.assertEqual(set(RecipeScore.objects.filter(
+            recipe__in=recipe_ids
+        ).values_list('recipe', flat=True)), recipe_ids)
+        self.assertEqual(set(FeedItem.objects.filter(
+            user=self.follower
+        ).values_list('recipe', flat=True)), recipe_ids)
@@ -0,0 +1,102 @@
+from api.cache import local_cache
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from recipes.models import Favorite, Ingredient, IngredientMount, Recipe
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .test_query_budgets import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecipeConditionalGetTests(TestCase):
+    """Условные GET запросы к списку и странице рецепта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='author'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='reader'
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='блины', text='блины',
+            image='recipes/test.jpg', cooking_time=10
+        )
+        cls.mount = IngredientMount.objects.create(
+            recipe=cls.recipe, ingredient=cls.ingredient, amount=5
+        )
+        cls.urls = ('/api/recipes/', f'/api/recipes/{cls.recipe.id}/')
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def get_etags(self):
+        etags = {}
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etags[url] = response['ETag']
+        return etags
+
+    def assert_changed(self, etags):
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_not_modified_without_queries(self):
+        for url, etag in self.get_etags().items():
+            with self.subTest(url=url), self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        etags = self.get_etags()
+        for url, etag in etags.items():
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=etag,
+                HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_own_favorite_is_visible_at_once(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        headers = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        etag = self.client.get(url, **headers)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{url}favorite/', **headers)
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_favorited'])
+
+    def test_other_users_favorite_keeps_etag(self):
+        etags = self.get_etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_recipe_change_changes_etag(self):
+        etags = self.get_etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.name = 'оладьи'
+            self.recipe.save()
+        self.assert_changed(etags)
+
+    def test_ingredient_amount_changes_etag(self):
+        etags = self.get_etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mount.amount = 10
+            self.mount.save()
+        self.assert_changed(etags)
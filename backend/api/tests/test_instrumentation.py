@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from foodgram.instrumentation import metrics
+from recipes.models import Ingredient, IngredientMount, Recipe, ShoppingCart
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .test_query_budgets import TEST_CACHES
+
+VIEW = 'RecipeModelViewSet.download_shopping_cart'
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryInstrumentationTests(TestCase):
+    """Учёт SQL запросов middleware и доступ к метрикам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='user'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        recipe = Recipe.objects.create(
+            author=cls.user, name='блины', text='блины',
+            image='recipes/test.jpg', cooking_time=10
+        )
+        IngredientMount.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=5
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def get_counted_queries(self):
+        with metrics.lock:
+            return metrics.values[(VIEW, 200)]['db_queries_total']
+
+    def test_streaming_response_queries_are_counted(self):
+        before = self.get_counted_queries()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/',
+                HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+            content = b''.join(response.streaming_content)
+        self.assertIn('мука'.encode(), content)
+        self.assertEqual(
+            self.get_counted_queries() - before,
+            len(context.captured_queries)
+        )
+
+    @override_settings(DEBUG=True, METRICS_TOKEN='')
+    def test_metrics_disabled_without_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+    @override_settings(DEBUG=True, METRICS_TOKEN='secret')
+    def test_metrics_require_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+        response = self.client.get(
+            '/metrics/', HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'foodgram_db_queries_total', response.content)
@@ -0,0 +1,76 @@
+from api.cache import local_cache
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from recipes.models import Recipe
+from rest_framework.authtoken.models import Token
+from users.models import Follow, User
+
+from .test_query_budgets import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PaginationTests(TestCase):
+    """Пагинация по курсору и кэширование COUNT(*) списков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='author'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='reader'
+        )
+        cls.token = Token.objects.create(user=cls.reader)
+        Follow.objects.create(user=cls.reader, following=cls.author)
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f'рецепт {number}', text='рецепт',
+                image='recipes/test.jpg', cooking_time=10
+            ) for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def create_recipe(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=self.author, name='новый', text='рецепт',
+                image='recipes/test.jpg', cooking_time=10
+            )
+
+    def test_cursor_pages_cover_all_recipes(self):
+        url = '/api/recipes/?pagination=cursor&limit=2'
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            ids.extend(recipe['id'] for recipe in data['results'])
+            url = data['next']
+        self.assertEqual(
+            ids, sorted((recipe.id for recipe in self.recipes), reverse=True)
+        )
+
+    def test_count_is_cached_until_table_changes(self):
+        url = '/api/recipes/?limit=2'
+        self.assertEqual(self.client.get(url).json()['count'], 5)
+        # bulk_create не отправляет сигналов и не меняет версию таблицы
+        Recipe.objects.bulk_create([Recipe(
+            author=self.author, name='без сигналов', text='рецепт',
+            image='recipes/test.jpg', cooking_time=10
+        )])
+        self.assertEqual(self.client.get(url).json()['count'], 5)
+        self.create_recipe()
+        self.assertEqual(self.client.get(url).json()['count'], 7)
+
+    def test_subscriptions_count_follows_follow_table(self):
+        url = '/api/users/subscriptions/'
+        headers = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+        self.assertEqual(self.client.get(url, **headers).json()['count'], 1)
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='other'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, following=other)
+        self.assertEqual(self.client.get(url, **headers).json()['count'], 2)
@@ -0,0 +1,146 @@
+from api.cache import local_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from recipes.feed import backfill_items
+from recipes.models import (Favorite, Ingredient, IngredientMount, Recipe,
+                            ShoppingCart, Tag)
+from rest_framework.authtoken.models import Token
+from users.models import Follow, User
+
+PREFIX = 'query_budget'
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': PREFIX,
+    }
+}
+
+
+@override_settings(CACHES=TEST_CACHES, QUERY_BUDGET_STRICT=False)
+class QueryBudgetTests(TestCase):
+    """
+    Количество SQL запросов к API не зависит от объёма данных и не
+    превышает бюджет из QUERY_BUDGETS. Для каждого размера данные
+    создаются в точке сохранения, которая затем откатывается. Каждый
+    запрос выполняется с пустым кэшем.
+    """
+
+    # количество авторов и рецептов в двух наборах данных
+    sizes = (5, 50)
+
+    def build_fixtures(self, size):
+        """
+        Создаёт пользователя, подписанного на size авторов, с size
+        рецептами в избранном, списке покупок и ленте, и отдельный рецепт
+        автора без подписки для проверки добавления и удаления.
+        """
+
+        tags = [
+            Tag.objects.create(
+                name=f'{PREFIX}_{number}', slug=f'{PREFIX}_{number}',
+                color='#FF0000'
+            ) for number in range(2)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'{PREFIX}_{number}', measurement_unit='г'
+            ) for number in range(3)
+        ]
+        viewer = User.objects.create_user(
+            username=f'{PREFIX}_viewer', email=f'{PREFIX}@example.com',
+            password=PREFIX
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'{PREFIX}_{number}',
+                email=f'{PREFIX}_{number}@example.com',
+                password=PREFIX
+            ) for number in range(size + 1)
+        ]
+        recipes = []
+        for author in authors:
+            recipe = Recipe.objects.create(
+                author=author, name=PREFIX, text=PREFIX,
+                image='recipes/query_budget.jpg', cooking_time=1
+            )
+            recipe.tags.set(tags)
+            IngredientMount.objects.bulk_create(
+                IngredientMount(recipe=recipe, ingredient=ingredient, amount=1)
+                for ingredient in ingredients
+            )
+            recipes.append(recipe)
+        target_author, target = authors.pop(), recipes.pop()
+        for author, recipe in zip(authors, recipes):
+            Follow.objects.create(user=viewer, following=author)
+            backfill_items([viewer.id], author.id)
+            Favorite.objects.create(user=viewer, recipe=recipe)
+            ShoppingCart.objects.create(user=viewer, recipe=recipe)
+        return viewer, recipes[0], target, target_author
+
+    def get_requests(self, recipe, target, target_author):
+        limit = '?limit=1000'
+        return (
+            ('get', f'/api/recipes/{limit}'),
+            ('get', f'/api/recipes/{recipe.id}/'),
+            ('get', f'/api/users/{limit}'),
+            ('get', f'/api/users/subscriptions/{limit}'),
+            ('get', f'/api/users/feed/{limit}'),
+            ('get', '/api/users/me/'),
+            ('get', '/api/recipes/download_shopping_cart/'),
+            ('post', f'/api/recipes/{target.id}/favorite/'),
+            ('delete', f'/api/recipes/{target.id}/favorite/'),
+            ('post', f'/api/recipes/{target.id}/shopping_cart/'),
+            ('delete', f'/api/recipes/{target.id}/shopping_cart/'),
+            ('post', f'/api/users/{target_author.id}/subscribe/'),
+            ('delete', f'/api/users/{target_author.id}/subscribe/'),
+        )
+
+    def measure(self, size):
+        """Возвращает {(метод, endpoint): (представление, запросов)}."""
+
+        results = {}
+        with transaction.atomic():
+            viewer, recipe, target, target_author = self.build_fixtures(
+                size
+            )
+            token = Token.objects.create(user=viewer)
+            for method, url in self.get_requests(
+                recipe, target, target_author
+            ):
+                cache.clear()
+                local_cache.clear()
+                with CaptureQueriesContext(connection) as context:
+                    response = getattr(self.client, method)(
+                        url, HTTP_AUTHORIZATION=f'Token {token.key}'
+                    )
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(
+                    response.status_code, 400, f'{method.upper()} {url}'
+                )
+                endpoint = url.split('?')[0]
+                for value in (recipe.id, target.id, target_author.id):
+                    endpoint = endpoint.replace(f'/{value}/', '/{id}/')
+                results[(method.upper(), endpoint)] = (
+                    response.wsgi_request.view_name,
+                    len(context.captured_queries)
+                )
+            transaction.set_rollback(True)
+        return results
+
+    def test_query_counts_within_budgets(self):
+        small, large = self.sizes
+        small_results = self.measure(small)
+        large_results = self.measure(large)
+        for key, (view, small_count) in small_results.items():
+            with self.subTest(method=key[0], endpoint=key[1], view=view):
+                budget = settings.QUERY_BUDGETS.get(view)
+                self.assertIsNotNone(budget, 'нет бюджета')
+                self.assertEqual(
+                    small_count, large_results[key][1],
+                    'зависит от объёма данных'
+                )
+                self.assertLessEqual(small_count, budget, 'превышен бюджет')
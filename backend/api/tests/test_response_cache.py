@@ -0,0 +1,64 @@
+from api.cache import local_cache
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from recipes.models import Ingredient, Tag
+
+from .test_query_budgets import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResponseCacheTests(TestCase):
+    """Кэширование ответов тэгов и ингредиентов по версии таблицы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = Tag.objects.create(
+            name='завтрак', slug='breakfast', color='#FF0000'
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_cached_response_without_queries(self):
+        for url in (
+            '/api/tags/', f'/api/tags/{self.tag.id}/',
+            '/api/ingredients/', f'/api/ingredients/{self.ingredient.id}/',
+        ):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=first['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_write_invalidates_response(self):
+        first = self.client.get('/api/tags/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='обед', slug='lunch', color='#00FF00')
+        response = self.client.get(
+            '/api/tags/', HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(
+            {tag['slug'] for tag in response.json()},
+            {'breakfast', 'lunch'}
+        )
+
+    def test_ingredient_write_does_not_invalidate_tags(self):
+        first = self.client.get('/api/tags/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='соль', measurement_unit='г')
+        response = self.client.get(
+            '/api/tags/', HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
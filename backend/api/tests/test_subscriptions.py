@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Recipe
+from rest_framework.authtoken.models import Token
+from users.models import Follow, User
+
+from .test_query_budgets import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SubscriptionsQueryCountTests(TestCase):
+    """
+    Количество SQL запросов к спискам подписок и пользователей не
+    растёт с числом авторов, на которых подписан пользователь.
+    """
+
+    recipes_per_author = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='viewer'
+        )
+        cls.token = Token.objects.create(user=cls.viewer)
+
+    def follow_authors(self, count):
+        start = User.objects.count()
+        for number in range(start, start + count):
+            author = User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com', password='author'
+            )
+            for _ in range(self.recipes_per_author):
+                Recipe.objects.create(
+                    author=author, name='блины', text='блины',
+                    image='recipes/test.jpg', cooking_time=10
+                )
+            Follow.objects.create(user=self.viewer, following=author)
+
+    def get(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(context.captured_queries)
+
+    def assert_constant_queries(self, url):
+        self.follow_authors(2)
+        _, few = self.get(url)
+        self.follow_authors(20)
+        data, many = self.get(url)
+        self.assertEqual(few, many)
+        return data
+
+    def test_subscriptions(self):
+        data = self.assert_constant_queries(
+            '/api/users/subscriptions/?limit=100&recipes_limit=2'
+        )
+        self.assertEqual(data['count'], 22)
+        for author in data['results']:
+            self.assertTrue(author['is_subscribed'])
+            self.assertEqual(len(author['recipes']), 2)
+            self.assertEqual(author['recipes_count'], self.recipes_per_author)
+
+    def test_users(self):
+        data = self.assert_constant_queries('/api/users/?limit=100')
+        subscribed = [user['is_subscribed'] for user in data['results']]
+        self.assertEqual(subscribed.count(True), 22)
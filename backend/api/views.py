@@ -1,20 +1,29 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from recipes.models import Ingredient, IngredientMount, Recipe, Tag
-from rest_framework import viewsets
+from recipes.autocomplete import search_ingredients
+from recipes.models import (Favorite, Ingredient, IngredientMount, Recipe,
+                            RecipeScore, ShoppingCart, Tag)
+from recipes.shopping_list import export_shopping_list
+from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
-
-from .filters import IngredientSearchFilter, RecipeFilter
-from .mixins import RecipePostDeleteMixin
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.response import Response
+
+from .cache import get_versions
+from .exporters import EXPORTERS
+from .filters import RecipeFilter
+from .mixins import (ConditionalGetMixin, CursorPaginationMixin,
+                     RecipePostDeleteMixin, RecipeQuerysetMixin,
+                     VersionedCacheMixin)
+from .negotiation import IgnoreFormatContentNegotiation
 from .pagination import NewPageNumberPagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (IngredientSerializer, RecipeGetSerializer,
                           RecipePostSerializer, TagSerializer)
 
 
-class TagsModelViewSet(viewsets.ModelViewSet):
+class TagsModelViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
     """
     Работа с данными модели Tags.
     Формирует представление данных при GET запросах к следующим endpoints:
@@ -22,51 +31,129 @@ class TagsModelViewSet(viewsets.ModelViewSet):
     /api/tags/{id}/
     """
 
+    cache_models = (Tag,)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
     http_method_names = ('get', )
 
 
-class IngredientsModelViewSet(viewsets.ModelViewSet):
+class IngredientsModelViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
     """
     Работа с данными модели Ingredients.
     Формирует представление данных при GET запросах к следующим endpoints:
     /api/ingredients/
     /api/ingredients/{id}/
+    /api/ingredients/?name=
+    Поиск по name выполняется по индексу в памяти: сначала совпадения
+    по началу названия, затем по подстроке, не более
+    INGREDIENT_SEARCH_LIMIT результатов.
     """
 
+    cache_models = (Ingredient,)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = [IngredientSearchFilter]
-    search_fields = ('^name',)
     http_method_names = ('get',)
 
+    def filter_queryset(self, queryset):
+        name = self.request.query_params.get('name')
+        if name and self.action == 'list':
+            return search_ingredients(name)
+        return super().filter_queryset(queryset)
+
 
-class RecipeModelViewSet(viewsets.ModelViewSet, RecipePostDeleteMixin):
+class RecipeModelViewSet(
+    RecipeQuerysetMixin, ConditionalGetMixin, CursorPaginationMixin,
+    viewsets.ModelViewSet, RecipePostDeleteMixin
+):
     """
     Работа с данными модели Recipe.
     Формирует представление данных при GET, POST, PATH, DEL запросах
     к следующим endpoints:
     /api/recipes/
     /api/recipes/{id}/
+    GET запросы поддерживают If-None-Match и If-Modified-Since.
+    Список поддерживает пагинацию по курсору: ?pagination=cursor.
+    Полнотекстовый поиск ?search= сортирует рецепты по релевантности,
+    ?ordering=popular|trending - по рейтингам RecipeScore, кроме
+    пагинации по курсору, где порядок всегда по id.
     """
 
-    queryset = Recipe.objects.all()
     permission_classes = [IsAuthorOrReadOnly]
     pagination_class = NewPageNumberPagination
+    count_models = (Recipe, Favorite, ShoppingCart)
+    # общие для всех клиентов таблицы, от которых зависит ответ;
+    # флаги пользователя учитываются через relations_updated_at
+    validator_models = (
+        Recipe, IngredientMount, Tag, Ingredient, RecipeScore
+    )
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
 
+    def get_validators(self):
+        """
+        Валидаторы ответа по версиям таблиц validator_models, без
+        запросов к БД. Флаги is_favorited, is_in_shopping_cart и
+        author_is_subscribed зависят от пользователя, поэтому в токен
+        входят его id и время изменения его избранного, списка покупок
+        и подписок. Действия других пользователей ETag не меняют, поэтому
+        счётчики favorites_count и in_carts_count в ответе могут отставать
+        до следующего изменения рецептов.
+        """
+
+        tables_token, tables_modified = get_versions(self.validator_models)
+        timestamps = [tables_modified]
+        user = self.request.user
+        if user.is_authenticated:
+            timestamps.append(user.relations_updated_at.timestamp())
+        token = ':'.join(map(str, (user.pk, tables_token, *timestamps)))
+        return token, max(timestamps)
+
     def get_serializer_class(self):
-        if self.action == 'get':
+        if self.request.method in SAFE_METHODS:
             return RecipeGetSerializer
         return RecipePostSerializer
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(
+        methods=['post'],
+        detail=False,
+        permission_classes=[IsAuthenticated]
+    )
+    def bulk(self, request):
+        """
+        Создаёт несколько рецептов одним запросом в одной транзакции
+        при POST запросе к endpoint:
+        /api/recipes/bulk/
+        Принимает список рецептов в формате POST /api/recipes/.
+        """
+
+        if (
+            not isinstance(request.data, list)
+            or len(request.data) > settings.RECIPES_BULK_MAX_SIZE
+        ):
+            raise serializers.ValidationError({
+                'non_field_errors': 'Ожидается список не более чем из '
+                f'{settings.RECIPES_BULK_MAX_SIZE} рецептов'
+            })
+        serializer = RecipePostSerializer(
+            data=request.data, many=True, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save(author=request.user)
+        queryset = self.get_queryset().filter(
+            id__in=[recipe.id for recipe in recipes]
+        )
+        return Response(
+            RecipeGetSerializer(
+                queryset, many=True, context={'request': request}
+            ).data,
+            status=status.HTTP_201_CREATED
+        )
+
     @action(
         methods=['post', 'delete'],
         detail=True,
@@ -100,30 +187,30 @@ class RecipeModelViewSet(viewsets.ModelViewSet, RecipePostDeleteMixin):
     @action(
         methods=['get'],
         detail=False,
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        content_negotiation_class=IgnoreFormatContentNegotiation
     )
     def download_shopping_cart(self, request):
         """
         Скачивает файл со список покупок необходимых для приготовления всех
-        рецептов в формате TXT при GET запросе к endpoint:
-        /api/recipes/download_shopping_cart/
+        рецептов при GET запросе к endpoint:
+        /api/recipes/download_shopping_cart/?format=txt|csv|pdf
+        По умолчанию используется формат TXT.
         """
 
-        shopping_list = IngredientMount.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values_list(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).order_by(
-            'ingredient__name'
-        ).annotate(
-            ingredient_total=Sum('amount')
+        exporter_class = EXPORTERS.get(
+            request.query_params.get('format', 'txt')
         )
-        content = (
-            [f'{item[0]} ({item[1]}) - {item[2]}\n' for item in shopping_list]
+        if exporter_class is None:
+            raise serializers.ValidationError({
+                'format': f'Доступные форматы: {", ".join(EXPORTERS)}'
+            })
+        exporter = exporter_class()
+        response = StreamingHttpResponse(
+            export_shopping_list(request.user, exporter),
+            content_type=exporter.content_type
         )
-        filename = 'shopping_cart.txt'
-        response = HttpResponse(content, content_type='text/plain')
         response['Content-Disposition'] = (
-            f'attachment; filename={filename}'
+            f'attachment; filename={exporter.filename}'
         )
         return response
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .paginator import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Базовый класс админки для больших таблиц: количество строк
+    оценивается без COUNT(*), общий размер таблицы при поиске не
+    запрашивается.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,139 @@
+import threading
+
+import psycopg2
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from psycopg2.pool import ThreadedConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Пул соединений процесса на POOL_SIZE соединений. Если свободных
+    соединений нет, поток ждёт до POOL_TIMEOUT секунд.
+    """
+
+    def __init__(self, size, timeout, conn_params):
+        self.pool = ThreadedConnectionPool(size, size, **conn_params)
+        self.slots = threading.BoundedSemaphore(size)
+        self.timeout = timeout
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                'Нет свободных соединений в пуле'
+            )
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            self.pool.putconn(connection, close=close)
+        finally:
+            self.slots.release()
+
+
+def get_pool(alias, settings_dict, conn_params):
+    with pools_lock:
+        if alias not in pools:
+            pools[alias] = ConnectionPool(
+                settings_dict['POOL_SIZE'], settings_dict['POOL_TIMEOUT'],
+                conn_params
+            )
+        return pools[alias]
+
+
+def is_alive(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Бэкенд PostgreSQL с проверкой постоянных соединений и
+    необязательным пулом соединений.
+    CONN_HEALTH_CHECKS: перед первым использованием соединения
+    в запросе оно проверяется, и разорванное соединение заменяется
+    новым вместо ошибки запроса.
+    POOL_SIZE: если больше нуля, соединения берутся из пула процесса
+    и возвращаются в него при закрытии.
+    """
+
+    def __init__(self, settings_dict, alias='default'):
+        settings_dict.setdefault('CONN_HEALTH_CHECKS', False)
+        settings_dict.setdefault('POOL_SIZE', 0)
+        settings_dict.setdefault('POOL_TIMEOUT', 10)
+        super().__init__(settings_dict, alias)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        if not self.settings_dict['POOL_SIZE']:
+            return None
+        return get_pool(
+            self.alias, self.settings_dict, self.get_connection_params()
+        )
+
+    def connect(self):
+        # новое соединение не нуждается в проверке, в том числе при
+        # вызове ensure_connection из set_autocommit внутри connect
+        self.health_check_done = True
+        super().connect()
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.getconn()
+        if self.settings_dict['CONN_HEALTH_CHECKS']:
+            # после перезапуска БД разорваны могут быть все соединения пула
+            for _ in range(self.settings_dict['POOL_SIZE']):
+                if is_alive(connection):
+                    break
+                pool.putconn(connection, close=True)
+                connection = pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda value: value
+        )
+        return connection
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and self.settings_dict['CONN_HEALTH_CHECKS']
+        ):
+            if not self.in_atomic_block and not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(
+                self.connection,
+                close=self.in_atomic_block or self.errors_occurred
+            )
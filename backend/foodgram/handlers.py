@@ -0,0 +1,76 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+from .instrumentation import get_view_name
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASGI_READ_WORKERS,
+        thread_name_prefix='asgi-read'
+    )
+
+
+class ReadPoolHandler(BaseHandler):
+    """
+    Синхронная цепочка middleware для обработки запросов чтения
+    в потоках пула. Каждый поток держит своё соединение с БД, которое
+    переиспользуется между запросами в пределах CONN_MAX_AGE.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.load_middleware()
+
+    def get_response(self, request):
+        close_old_connections()
+        try:
+            return super().get_response(request)
+        finally:
+            close_old_connections()
+
+
+class ReadPoolASGIHandler(ASGIHandler):
+    """
+    ASGI обработчик, который выполняет GET и HEAD запросы к
+    представлениям из ASGI_READ_VIEWS в ограниченном пуле потоков
+    ASGI_READ_WORKERS. Стандартный ASGIHandler Django 3.2 выполняет
+    все синхронные представления в одном общем потоке, поэтому
+    медленные запросы к БД блокировали бы друг друга. Остальные
+    запросы, в том числе запись, обрабатываются как обычно.
+    """
+
+    read_methods = ('GET', 'HEAD')
+
+    def __init__(self):
+        super().__init__()
+        self.read_handler = ReadPoolHandler()
+
+    def is_read_request(self, request):
+        if request.method not in self.read_methods:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return get_view_name(
+            match.func, request.method
+        ) in settings.ASGI_READ_VIEWS
+
+    async def get_response_async(self, request):
+        if not self.is_read_request(request):
+            return await super().get_response_async(request)
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            get_executor(), context.run,
+            self.read_handler.get_response, request
+        )
@@ -0,0 +1,202 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceededError(Exception):
+    """Представление выполнило больше запросов, чем задано в бюджете."""
+
+
+def fingerprint(sql):
+    """
+    Нормализует текст запроса: литералы и списки IN сворачиваются,
+    чтобы одинаковые запросы с разными параметрами совпадали.
+    """
+
+    return IN_LIST.sub('(%s...)', LITERAL.sub('%s', sql))
+
+
+class QueryRecorder:
+    """Обёртка для connection.execute_wrapper, учитывающая запросы."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return sum(
+            count - 1 for count in self.fingerprints.values() if count > 1
+        )
+
+
+class Metrics:
+    """Накопительные метрики запросов процесса по представлениям."""
+
+    FIELDS = (
+        ('requests_total', 'counter', 'Количество запросов'),
+        ('request_seconds_total', 'counter', 'Время обработки запросов'),
+        ('db_queries_total', 'counter', 'Количество SQL запросов'),
+        ('db_seconds_total', 'counter', 'Время выполнения SQL запросов'),
+        (
+            'db_duplicate_queries_total', 'counter',
+            'Количество повторяющихся SQL запросов'
+        ),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(lambda: dict.fromkeys(
+            (name for name, _, _ in self.FIELDS), 0
+        ))
+
+    def observe(self, view, status, recorder, duration):
+        with self.lock:
+            values = self.values[(view, status)]
+            values['requests_total'] += 1
+            values['request_seconds_total'] += duration
+            values['db_queries_total'] += recorder.count
+            values['db_seconds_total'] += recorder.duration
+            values['db_duplicate_queries_total'] += recorder.duplicates
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus."""
+
+        with self.lock:
+            values = {key: dict(value) for key, value in self.values.items()}
+        lines = []
+        for name, kind, description in self.FIELDS:
+            metric = f'foodgram_{name}'
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {kind}')
+            for (view, status), value in sorted(values.items()):
+                lines.append(
+                    f'{metric}{{view="{view}",status="{status}"}} '
+                    f'{value[name]}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def get_view_name(view_func, method):
+    """
+    Имя представления DRF вида RecipeModelViewSet.favorite: класс
+    и действие viewset или HTTP метод для APIView.
+    """
+
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return view_func.__name__
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Учитывает количество и время SQL запросов, повторяющиеся запросы
+    и общее время обработки каждого запроса. Результат отдаётся
+    в заголовке Server-Timing и накапливается для metrics_view. Для
+    потоковых ответов учитываются и запросы при чтении тела ответа.
+    Если для представления задан бюджет в QUERY_BUDGETS и включён
+    QUERY_BUDGET_STRICT, превышение бюджета вызывает QueryBudgetExceededError.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.view_name = None
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response, response.streaming_content, recorder,
+                started
+            )
+            return response
+        duration = time.perf_counter() - started
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries"',
+            f'dup;desc="{recorder.duplicates} duplicate queries"',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+        self.finish(request, response, recorder, duration)
+        return response
+
+    def stream(self, request, response, content, recorder, started):
+        """
+        Учитывает запросы, выполняемые при чтении потокового ответа.
+        Заголовки к этому моменту уже отправлены, поэтому Server-Timing
+        не добавляется, а метрики записываются после последнего блока.
+        """
+
+        with connection.execute_wrapper(recorder):
+            yield from content
+        self.finish(
+            request, response, recorder, time.perf_counter() - started
+        )
+
+    def finish(self, request, response, recorder, duration):
+        view = request.view_name or 'unresolved'
+        metrics.observe(view, response.status_code, recorder, duration)
+        self.check_budget(view, recorder)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_name = get_view_name(view_func, request.method)
+
+    def check_budget(self, view, recorder):
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is None or recorder.count <= budget:
+            return
+        repeated = recorder.fingerprints.most_common(1)[0]
+        message = (
+            f'{view}: {recorder.count} SQL запросов при бюджете {budget}; '
+            f'чаще всего ({repeated[1]} раз): {repeated[0]}'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceededError(message)
+        logger.warning(message)
+
+
+def metrics_view(request):
+    """
+    Метрики процесса в формате Prometheus. Доступны только с заголовком
+    Authorization: Bearer <METRICS_TOKEN>, без METRICS_TOKEN - отключены.
+    """
+
+    token = settings.METRICS_TOKEN
+    if (
+        not token
+        or request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}'
+    ):
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
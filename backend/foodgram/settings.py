@@ -1,4 +1,5 @@
 import os.path
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -13,6 +14,8 @@ SECRET_KEY = os.environ.get('SECRET_KEY', '123')
 
 DEBUG = True
 
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = ['*']
 
 
@@ -32,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,7 +81,18 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Для работы через pgbouncer в режиме пула транзакций
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_PGBOUNCER', default='0') == '1'
+        ),
+        # Поддерживаются бэкендом foodgram.db.postgresql
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', default='1') == '1'
+        ),
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', default=0)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
     }
 }
 
@@ -139,3 +154,138 @@ DJOSER = {
     },
     'HIDE_USERS': False,
 }
+
+# кэш общий для всех процессов gunicorn: в нем лежат версии таблиц,
+# по которым строятся ETag и ключи кэша ответов
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.memcached.PyMemcacheCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='memcached:11211'),
+    }
+}
+if TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', default=60 * 60 * 24)
+)
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', default=20))
+INGREDIENT_INDEX_MAX_SIZE = int(
+    os.getenv('INGREDIENT_INDEX_MAX_SIZE', default=100000)
+)
+
+RECIPES_BULK_MAX_SIZE = int(os.getenv('RECIPES_BULK_MAX_SIZE', default=100))
+# Подбор рецептов по имеющимся ингредиентам (?have=)
+RECIPES_HAVE_LIMIT = int(os.getenv('RECIPES_HAVE_LIMIT', default=500))
+RECIPES_HAVE_BATCH_SIZE = int(
+    os.getenv('RECIPES_HAVE_BATCH_SIZE', default=2000)
+)
+# Журнал изменений наборов ингредиентов рецептов для индексов в памяти
+RECIPE_INGREDIENT_CHANGES_MAX = int(
+    os.getenv('RECIPE_INGREDIENT_CHANGES_MAX', default=1000)
+)
+RECIPE_INGREDIENT_CHANGES_TIMEOUT = int(
+    os.getenv('RECIPE_INGREDIENT_CHANGES_TIMEOUT', default=60 * 60 * 24)
+)
+
+# Лента подписок: рецепты авторов, у которых не меньше FEED_PULL_THRESHOLD
+# подписчиков, не раздаются в ленты, а читаются при запросе ленты
+FEED_PULL_THRESHOLD = int(os.getenv('FEED_PULL_THRESHOLD', default=10000))
+FEED_FANOUT_BATCH_SIZE = int(
+    os.getenv('FEED_FANOUT_BATCH_SIZE', default=1000)
+)
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', default=50))
+# в тестах рассылка идёт в потоке запроса: фоновые потоки не видят
+# тестовую транзакцию и блокируют базу SQLite
+FEED_ASYNC = os.getenv('FEED_ASYNC', default='1') == '1' and not TESTING
+FEED_WORKERS = int(os.getenv('FEED_WORKERS', default=2))
+
+# Рейтинги рецептов для ?ordering=popular|trending: веса событий и
+# периоды полураспада в часах
+RECIPE_SCORE_WEIGHTS = {
+    'created': 1,
+    'favorite': 3,
+    'cart': 2,
+    'follow': 1,
+}
+RECIPE_SCORE_HALF_LIVES = {
+    'popular': int(os.getenv('RECIPE_SCORE_POPULAR_HALF_LIFE', default=720)),
+    'trending': int(os.getenv('RECIPE_SCORE_TRENDING_HALF_LIFE', default=24)),
+}
+RECIPE_SCORE_BATCH_SIZE = int(
+    os.getenv('RECIPE_SCORE_BATCH_SIZE', default=1000)
+)
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=5 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_DIMENSION = int(
+    os.getenv('RECIPE_IMAGE_MAX_DIMENSION', default=6000)
+)
+RECIPE_THUMBNAIL_WIDTHS = (320, 640)
+RECIPE_THUMBNAIL_QUALITY = 80
+RECIPE_IMAGE_ASYNC = (
+    os.getenv('RECIPE_IMAGE_ASYNC', default='1') == '1' and not TESTING
+)
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', default=2))
+
+RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RESPONSE_CACHE_TIMEOUT', default=60 * 60 * 24)
+)
+RESPONSE_CACHE_LOCAL_SIZE = int(
+    os.getenv('RESPONSE_CACHE_LOCAL_SIZE', default=256)
+)
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', default=60 * 5)
+)
+
+# Списки админки по таблицам больше этого размера показывают оценку
+# количества строк из планировщика PostgreSQL вместо COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(
+    os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=10000)
+)
+
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', default='0') == '1'
+# Максимальное количество SQL запросов на запрос к представлению
+QUERY_BUDGETS = {
+    'RecipeModelViewSet.list': 7,
+    'RecipeModelViewSet.retrieve': 6,
+    'RecipeModelViewSet.favorite': 8,
+    'RecipeModelViewSet.shopping_cart': 14,
+    'RecipeModelViewSet.download_shopping_cart': 4,
+    'FollowListApiView.get': 4,
+    'FeedListApiView.get': 7,
+    'FollowApiView.post': 11,
+    'FollowApiView.delete': 8,
+    'CustomUserViewSet.list': 4,
+    'CustomUserViewSet.retrieve': 4,
+    'CustomUserViewSet.me': 3,
+    'TagsModelViewSet.list': 2,
+    'TagsModelViewSet.retrieve': 2,
+    'IngredientsModelViewSet.list': 2,
+    'IngredientsModelViewSet.retrieve': 2,
+}
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+
+# Представления, запросы чтения к которым при запуске через ASGI
+# выполняются в пуле потоков foodgram.handlers.ReadPoolASGIHandler
+ASGI_READ_VIEWS = (
+    'RecipeModelViewSet.list',
+    'RecipeModelViewSet.retrieve',
+    'IngredientsModelViewSet.list',
+    'IngredientsModelViewSet.retrieve',
+)
+ASGI_READ_WORKERS = int(os.getenv('ASGI_READ_WORKERS', default=16))
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from .instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view),
     path('api/', include('users.urls')),
     path('api/', include('api.urls'))
 ]
@@ -1,7 +1,19 @@
 from django.contrib import admin
+from foodgram.admin import LargeTableAdmin
 
 from .models import (Favorite, Ingredient, IngredientMount, Recipe,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingListItem, Tag)
+from .shopping_list import track_recipe_amounts
+
+
+class RecipeRelatedAdmin(LargeTableAdmin):
+    """
+    Админка моделей со ссылкой на рецепт: рецепт загружается в списке
+    через list_select_related, но без поля search_vector.
+    """
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('recipe__search_vector')
 
 
 @admin.register(Tag)
@@ -15,52 +27,108 @@ class TagsAdmin(admin.ModelAdmin):
 
 
 @admin.register(Ingredient)
-class IngredientsAdmin(admin.ModelAdmin):
+class IngredientsAdmin(LargeTableAdmin):
     list_display = (
         'name',
         'measurement_unit'
     )
-    list_filter = ('name',)
+    search_fields = ('^name',)
 
 
 class IngredientInLine(admin.TabularInline):
     model = IngredientMount
-    raw_id_fields = ['ingredient']
+    autocomplete_fields = ['ingredient']
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdmin):
     list_display = (
         'id',
         'author',
         'name',
         'cooking_time',
+        'favorites_count',
+        'in_carts_count',
     )
+    list_select_related = ('author',)
     list_filter = ('tags',)
+    search_fields = ('^name', '^author__username')
+    autocomplete_fields = ('author',)
     inlines = [IngredientInLine]
 
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not IngredientMount:
+            return super().save_formset(request, form, formset, change)
+        with track_recipe_amounts([form.instance.pk]):
+            super().save_formset(request, form, formset, change)
+
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(RecipeRelatedAdmin):
     list_display = (
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(Favorite)
-class FavoriteCartAdmin(admin.ModelAdmin):
+class FavoriteCartAdmin(RecipeRelatedAdmin):
     list_display = (
         'id',
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(IngredientMount)
-class IngredientMountAdmin(admin.ModelAdmin):
+class IngredientMountAdmin(RecipeRelatedAdmin):
     list_display = (
         'ingredient',
         'recipe',
         'amount'
     )
+    list_select_related = ('ingredient', 'recipe')
+    search_fields = ('^ingredient__name',)
+    autocomplete_fields = ('ingredient', 'recipe')
+
+    def get_recipe_ids(self, obj):
+        """Рецепт объекта и рецепт, к которому он был привязан до правки."""
+
+        recipe_ids = {obj.recipe_id}
+        if obj.pk is not None:
+            recipe_ids.update(IngredientMount.objects.filter(
+                pk=obj.pk
+            ).values_list('recipe_id', flat=True))
+        return recipe_ids
+
+    def save_model(self, request, obj, form, change):
+        with track_recipe_amounts(self.get_recipe_ids(obj)):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with track_recipe_amounts(self.get_recipe_ids(obj)):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with track_recipe_amounts(
+            queryset.values_list('recipe_id', flat=True)
+        ):
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(LargeTableAdmin):
+    list_display = (
+        'user',
+        'ingredient',
+        'total_amount'
+    )
+    list_select_related = ('user', 'ingredient')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user', 'ingredient')
@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
     verbose_name = 'Рецепты'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .autocomplete import install_autocomplete
+        from .search import install_search
+        post_migrate.connect(install_search, sender=self)
+        post_migrate.connect(install_autocomplete, sender=self)
@@ -0,0 +1,123 @@
+import threading
+from bisect import bisect_left
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.functions import Upper
+
+from .models import Ingredient
+from .versions import get_table_version
+
+# name__istartswith в PostgreSQL - UPPER(name::text) LIKE UPPER(%s),
+# text_pattern_ops позволяет искать по префиксу независимо от collation
+POSTGRESQL_SETUP = (
+    """
+    CREATE INDEX IF NOT EXISTS ingredient_name_prefix_idx
+    ON recipes_ingredient (UPPER(name::text) text_pattern_ops)
+    """,
+)
+
+
+class IngredientIndex:
+    """
+    Отсортированный индекс названий ингредиентов в памяти процесса.
+    Поиск по префиксу выполняется бинарным поиском, затем добавляются
+    совпадения по подстроке.
+    """
+
+    def __init__(self, ingredients):
+        entries = sorted(
+            (ingredient.name.casefold(), ingredient.id, ingredient)
+            for ingredient in ingredients
+        )
+        self.keys = [key for key, _, _ in entries]
+        self.ingredients = [ingredient for _, _, ingredient in entries]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, query, limit):
+        query = query.casefold().strip()
+        if not query:
+            return self.ingredients[:limit]
+        start = bisect_left(self.keys, query)
+        end = start
+        while (
+            end < len(self.keys) and end - start < limit
+            and self.keys[end].startswith(query)
+        ):
+            end += 1
+        result = self.ingredients[start:end]
+        if len(result) < limit:
+            result.extend(islice((
+                ingredient
+                for key, ingredient in zip(self.keys, self.ingredients)
+                if query in key and not key.startswith(query)
+            ), limit - len(result)))
+        return result
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def _rebuild_index(version):
+    global _index, _index_version
+    max_size = settings.INGREDIENT_INDEX_MAX_SIZE
+    with _lock:
+        if _index_version != version:
+            ingredients = list(Ingredient.objects.all()[:max_size + 1])
+            _index = (
+                IngredientIndex(ingredients)
+                if len(ingredients) <= max_size else None
+            )
+            _index_version = version
+
+
+def get_index():
+    """
+    Возвращает индекс текущей версии, перестраивая его после изменения
+    модели Ingredient в любом процессе. Если ингредиентов больше
+    INGREDIENT_INDEX_MAX_SIZE, возвращает None.
+    """
+
+    version, _ = get_table_version(Ingredient)
+    if _index_version != version:
+        _rebuild_index(version)
+    return _index
+
+
+def install_autocomplete(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Создаёт в PostgreSQL индекс для поиска ингредиентов по префиксу
+    названия без учёта регистра. Вызывается после migrate, повторный
+    вызов ничего не меняет.
+    """
+
+    database = connections[using]
+    if database.vendor != 'postgresql':
+        return
+    with database.cursor() as cursor:
+        for statement in POSTGRESQL_SETUP:
+            cursor.execute(statement)
+
+
+def search_in_database(query, limit):
+    """
+    Поиск в БД по префиксу названия по индексу ingredient_name_prefix_idx.
+    Используется, когда справочник слишком велик для индекса в памяти.
+    """
+
+    return list(Ingredient.objects.filter(
+        name__istartswith=query.strip()
+    ).order_by(Upper('name'), 'id')[:limit])
+
+
+def search_ingredients(query, limit=None):
+    limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+    index = get_index()
+    if index is None:
+        return search_in_database(query, limit)
+    return index.search(query, limit)
@@ -0,0 +1,57 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from users.models import Follow, User
+
+from .models import Favorite, Recipe, ShoppingCart
+
+# (модель, поле счётчика, модель событий, поле связи с моделью счётчика)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'following'),
+)
+
+
+def change_counter(model, pk, field, delta, **values):
+    """
+    Атомарно изменяет счётчик field объекта model на delta через F().
+    Счётчик не опускается ниже нуля. values обновляются тем же запросом.
+    """
+
+    if pk is None:
+        return
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta}, **values)
+
+
+def count_expression(source, relation):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(
+                **{relation: OuterRef('pk')}
+            ).order_by().values(relation).annotate(
+                total=Count('pk')
+            ).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def get_counter_drift(model, field, source, relation):
+    """Количество объектов, у которых счётчик не совпадает с реальным."""
+
+    return model.objects.annotate(
+        actual=count_expression(source, relation)
+    ).exclude(**{field: F('actual')}).count()
+
+
+def reconcile_counter(model, field, source, relation):
+    """Пересчитывает счётчик одним UPDATE для всей таблицы."""
+
+    return model.objects.update(
+        **{field: count_expression(source, relation)}
+    )
@@ -0,0 +1,162 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from users.models import Follow, User
+
+from .models import FeedItem, Recipe
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.FEED_WORKERS,
+        thread_name_prefix='recipe-feed'
+    )
+
+
+def _batches(items, size):
+    items = iter(items)
+    batch = list(islice(items, size))
+    while batch:
+        yield batch
+        batch = list(islice(items, size))
+
+
+def _create_items(items):
+    FeedItem.objects.bulk_create(
+        items, batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fan_out_recipes(recipe_ids):
+    """
+    Добавляет рецепты в ленты подписчиков их авторов пачками по
+    FEED_FANOUT_BATCH_SIZE подписчиков, подписчики каждого автора
+    читаются один раз. Если у автора не меньше FEED_PULL_THRESHOLD
+    подписчиков, его рецепты не раздаются: автор помечается флагом
+    feed_pull, и его рецепты читаются при запросе ленты.
+    """
+
+    by_author = defaultdict(list)
+    pull_authors = set()
+    for recipe_id, author_id, followers_count in Recipe.objects.filter(
+        id__in=recipe_ids, author__isnull=False, author__feed_pull=False
+    ).values_list('id', 'author_id', 'author__followers_count'):
+        if followers_count >= settings.FEED_PULL_THRESHOLD:
+            pull_authors.add(author_id)
+        else:
+            by_author[author_id].append(recipe_id)
+    if pull_authors:
+        User.objects.filter(pk__in=pull_authors).update(feed_pull=True)
+    for author_id, author_recipe_ids in by_author.items():
+        followers = Follow.objects.filter(following_id=author_id).order_by(
+            'user_id'
+        ).values_list('user_id', flat=True).iterator()
+        for batch in _batches(followers, settings.FEED_FANOUT_BATCH_SIZE):
+            _create_items(
+                FeedItem(
+                    user_id=user_id, recipe_id=recipe_id, author_id=author_id
+                )
+                for user_id in batch
+                for recipe_id in author_recipe_ids
+            )
+
+
+def backfill_items(user_ids, author_id):
+    """
+    Добавляет в ленты подписчиков user_ids последние FEED_BACKFILL_SIZE
+    рецептов автора. Возвращает количество записей.
+    """
+
+    recipe_ids = list(Recipe.objects.filter(author_id=author_id).order_by(
+        '-id'
+    ).values_list('id', flat=True)[:settings.FEED_BACKFILL_SIZE])
+    _create_items(
+        FeedItem(user_id=user_id, recipe_id=recipe_id, author_id=author_id)
+        for user_id in user_ids
+        for recipe_id in recipe_ids
+    )
+    return len(user_ids) * len(recipe_ids)
+
+
+def backfill_follow(user_id, author_id):
+    if not User.objects.filter(pk=author_id, feed_pull=True).exists():
+        backfill_items([user_id], author_id)
+
+
+def remove_follow(user_id, author_id):
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def run_safely(function, *args):
+    try:
+        function(*args)
+    except Exception:
+        logger.exception('Не удалось обновить ленты: %s%s', function, args)
+
+
+def run_in_worker(function, *args):
+    try:
+        run_safely(function, *args)
+    finally:
+        connection.close()
+
+
+def schedule(function, *args):
+    """
+    Выполняет обновление лент после фиксации транзакции в пуле потоков.
+    При FEED_ASYNC = False обновление выполняется в текущем потоке.
+    Ленты можно пересобрать командой rebuild_feeds.
+    """
+
+    if settings.FEED_ASYNC:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_worker, function, *args)
+        )
+    else:
+        transaction.on_commit(partial(run_safely, function, *args))
+
+
+def get_feed_ids(user_id, before=None, limit=10):
+    """
+    Возвращает до limit id рецептов ленты пользователя по убыванию id,
+    меньших before. Раздаваемые рецепты читаются диапазоном индекса
+    (user, recipe) таблицы FeedItem, рецепты авторов с feed_pull -
+    диапазонами индекса (author, -id) по каждому автору, результаты
+    сливаются.
+    """
+
+    items = FeedItem.objects.filter(user_id=user_id)
+    recipes = Recipe.objects.all()
+    if before is not None:
+        items = items.filter(recipe_id__lt=before)
+        recipes = recipes.filter(id__lt=before)
+    ids = set(items.order_by('-recipe_id').values_list(
+        'recipe_id', flat=True
+    )[:limit])
+    authors = list(Follow.objects.filter(
+        user_id=user_id, following__feed_pull=True
+    ).values_list('following_id', flat=True))
+    if len(authors) > 1 and (
+        connection.features.supports_slicing_ordering_in_compound
+    ):
+        first, *other = (
+            recipes.filter(author_id=author_id).order_by(
+                '-id'
+            ).values_list('id', flat=True)[:limit]
+            for author_id in authors
+        )
+        ids.update(first.union(*other, all=True))
+    elif authors:
+        ids.update(recipes.filter(author_id__in=authors).order_by(
+            '-id'
+        ).values_list('id', flat=True)[:limit])
+    return sorted(ids, reverse=True)[:limit]
@@ -0,0 +1,125 @@
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import Recipe
+from .versions import bump_table_version
+
+logger = logging.getLogger(__name__)
+
+# расширение файла миниатюры: формат Pillow
+THUMBNAIL_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.RECIPE_IMAGE_WORKERS,
+        thread_name_prefix='recipe-thumbnails'
+    )
+
+
+def get_storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def render_thumbnail(image, width, image_format):
+    height = max(round(image.height * width / image.width), 1)
+    thumbnail = image.resize((width, height), Image.LANCZOS)
+    if image_format == 'JPEG' and thumbnail.mode != 'RGB':
+        thumbnail = thumbnail.convert('RGB')
+    buffer = io.BytesIO()
+    thumbnail.save(
+        buffer, image_format, quality=settings.RECIPE_THUMBNAIL_QUALITY
+    )
+    return buffer.getvalue()
+
+
+def delete_thumbnails(thumbnails):
+    storage = get_storage()
+    for extension in THUMBNAIL_FORMATS:
+        for name in thumbnails.get(extension, {}).values():
+            storage.delete(name)
+
+
+def generate_thumbnails(recipe_id, force=False):
+    """
+    Создаёт миниатюры изображения рецепта в форматах THUMBNAIL_FORMATS
+    для ширин RECIPE_THUMBNAIL_WIDTHS и сохраняет их имена в
+    Recipe.image_thumbnails. Если изображение успело смениться,
+    созданные файлы удаляются.
+    """
+
+    recipe = Recipe.objects.filter(id=recipe_id).only(
+        'id', 'image', 'image_thumbnails'
+    ).first()
+    if recipe is None or not recipe.image:
+        return
+    source = recipe.image.name
+    if not force and recipe.image_thumbnails.get('source') == source:
+        return
+    with recipe.image.open('rb') as file:
+        image = Image.open(file)
+        image.load()
+    storage = get_storage()
+    stem = PurePosixPath(source).stem
+    thumbnails = {'source': source}
+    for extension, image_format in THUMBNAIL_FORMATS.items():
+        thumbnails[extension] = {}
+        for width in settings.RECIPE_THUMBNAIL_WIDTHS:
+            content = render_thumbnail(
+                image, min(width, image.width), image_format
+            )
+            thumbnails[extension][str(width)] = storage.save(
+                f'recipes/thumbnails/{stem}_{width}.{extension}',
+                ContentFile(content)
+            )
+    updated = Recipe.objects.filter(
+        id=recipe_id, image=source
+    ).update(image_thumbnails=thumbnails, updated_at=timezone.now())
+    if updated:
+        bump_table_version(Recipe)
+    delete_thumbnails(recipe.image_thumbnails if updated else thumbnails)
+
+
+def generate_thumbnails_safely(recipe_id):
+    try:
+        generate_thumbnails(recipe_id)
+    except Exception:
+        logger.exception(
+            'Не удалось создать миниатюры рецепта %s', recipe_id
+        )
+
+
+def run_in_worker(recipe_id):
+    try:
+        generate_thumbnails_safely(recipe_id)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(recipe_id):
+    """
+    Ставит создание миниатюр в очередь после фиксации транзакции.
+    При RECIPE_IMAGE_ASYNC = False миниатюры создаются в текущем потоке.
+    Рецепты без актуальных миниатюр можно догнать командой
+    generate_thumbnails.
+    """
+
+    if settings.RECIPE_IMAGE_ASYNC:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_worker, recipe_id)
+        )
+    else:
+        transaction.on_commit(lambda: generate_thumbnails_safely(recipe_id))
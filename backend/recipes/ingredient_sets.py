@@ -0,0 +1,258 @@
+import heapq
+import threading
+from array import array
+from collections import Counter, defaultdict
+from functools import partial
+from itertools import groupby, islice
+from operator import itemgetter
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import IngredientMount
+
+GENERATION_KEY = 'recipe_ingredient_sets:generation'
+SEQUENCE_KEY = 'recipe_ingredient_sets:sequence'
+CHANGE_KEY = 'recipe_ingredient_sets:change:{generation}:{number}'
+
+
+class RecipeIngredientIndex:
+    """
+    Инвертированный индекс в памяти процесса: для каждого ингредиента
+    массив id рецептов, для каждого рецепта массив id его ингредиентов.
+    Рецепты по набору ингредиентов ранжируются без запросов к БД.
+    Индекс, отданный get_index, не изменяется: изменения применяются
+    к копии (copy), массивы в которой заменяются, а не дополняются.
+    """
+
+    def __init__(self, rows=(), generation=None, sequence=0):
+        """rows - пары (recipe_id, ingredient_id), упорядоченные по рецепту."""
+
+        self.generation = generation
+        self.sequence = sequence
+        self.recipes = {}
+        self.postings = defaultdict(partial(array, 'q'))
+        for recipe_id, group in groupby(rows, key=itemgetter(0)):
+            ingredient_ids = self._ingredient_array(
+                ingredient_id for _, ingredient_id in group
+            )
+            if not ingredient_ids:
+                continue
+            self.recipes[recipe_id] = ingredient_ids
+            for ingredient_id in ingredient_ids:
+                self.postings[ingredient_id].append(recipe_id)
+
+    def __len__(self):
+        return len(self.recipes)
+
+    @staticmethod
+    def _ingredient_array(ingredient_ids):
+        return array('q', sorted(set(ingredient_ids)))
+
+    def copy(self, generation, sequence):
+        """Копия индекса, разделяющая с ним неизменяемые массивы."""
+
+        index = RecipeIngredientIndex(generation=generation, sequence=sequence)
+        index.recipes = dict(self.recipes)
+        index.postings.update(self.postings)
+        return index
+
+    def update(self, recipe_id, ingredient_ids):
+        """Заменяет набор ингредиентов рецепта, пустой набор удаляет его."""
+
+        old = self.recipes.pop(recipe_id, ())
+        new = self._ingredient_array(ingredient_ids)
+        if new:
+            self.recipes[recipe_id] = new
+        for ingredient_id in set(old) - set(new):
+            self.postings[ingredient_id] = array('q', (
+                other for other in self.postings[ingredient_id]
+                if other != recipe_id
+            ))
+        for ingredient_id in set(new) - set(old):
+            self.postings[ingredient_id] = (
+                self.postings[ingredient_id] + array('q', (recipe_id,))
+            )
+
+    def ranked(self, ingredient_ids):
+        """
+        Генератор пар (recipe_id, недостающих ингредиентов) для рецептов
+        хотя бы с одним ингредиентом из ingredient_ids: сначала рецепты,
+        для которых есть всё, затем по числу недостающих ингредиентов,
+        при равенстве - новые рецепты. Пары извлекаются из кучи по мере
+        чтения, поэтому первые из них не требуют полной сортировки.
+        """
+
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(self.postings.get(ingredient_id, ()))
+        heap = [
+            (len(self.recipes[recipe_id]) - count, -recipe_id)
+            for recipe_id, count in matched.items()
+        ]
+        heapq.heapify(heap)
+        while heap:
+            missing, recipe_id = heapq.heappop(heap)
+            yield -recipe_id, missing
+
+    def match(self, ingredient_ids, limit):
+        """Первые limit пар ranked."""
+
+        return list(islice(self.ranked(ingredient_ids), limit))
+
+
+def load_rows(recipe_ids=None):
+    queryset = IngredientMount.objects.order_by('recipe_id')
+    if recipe_ids is not None:
+        queryset = queryset.filter(recipe_id__in=recipe_ids)
+    return queryset.values_list('recipe_id', 'ingredient_id').iterator()
+
+
+def _log_changes(recipe_ids):
+    generation = cache.get_or_set(GENERATION_KEY, uuid4().hex, None)
+    cache.add(SEQUENCE_KEY, 0, None)
+    last = cache.incr(SEQUENCE_KEY, len(recipe_ids))
+    cache.set_many({
+        CHANGE_KEY.format(generation=generation, number=number): recipe_id
+        for number, recipe_id in enumerate(
+            recipe_ids, start=last - len(recipe_ids) + 1
+        )
+    }, settings.RECIPE_INGREDIENT_CHANGES_TIMEOUT)
+
+
+def log_recipe_changes(recipe_ids):
+    """
+    Записывает в журнал изменений в кэше рецепты, наборы ингредиентов
+    которых изменились. Индексы всех процессов применяют журнал при
+    следующем обращении. Запись делается после фиксации транзакции.
+    """
+
+    if recipe_ids:
+        transaction.on_commit(partial(_log_changes, list(recipe_ids)))
+
+
+def log_recipe_change(recipe_id):
+    log_recipe_changes([recipe_id])
+
+
+def reset_index():
+    """Заставляет все процессы перестроить индекс целиком."""
+
+    cache.set_many({GENERATION_KEY: uuid4().hex, SEQUENCE_KEY: 0}, None)
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def _sync_index(generation, sequence):
+    global _index
+    with _lock:
+        index = _index
+        if index is not None and (
+            index.generation,
+            index.sequence
+        ) == (generation, sequence):
+            return
+        changes = {}
+        if (
+            index is not None and index.generation == generation
+            and 0 <= sequence - index.sequence
+            <= settings.RECIPE_INGREDIENT_CHANGES_MAX
+        ):
+            keys = [
+                CHANGE_KEY.format(generation=generation, number=number)
+                for number in range(index.sequence + 1, sequence + 1)
+            ]
+            changes = cache.get_many(keys)
+            if len(changes) < len(keys):
+                index = None
+        else:
+            index = None
+        if index is None:
+            _index = RecipeIngredientIndex(load_rows(), generation, sequence)
+            return
+        recipe_ids = set(changes.values())
+        loaded = {
+            recipe_id: [ingredient_id for _, ingredient_id in group]
+            for recipe_id, group in groupby(
+                load_rows(recipe_ids), key=itemgetter(0)
+            )
+        }
+        # потоки, читающие текущий индекс, не видят частичных изменений
+        index = index.copy(generation, sequence)
+        for recipe_id in recipe_ids:
+            index.update(recipe_id, loaded.get(recipe_id, ()))
+        _index = index
+
+
+def get_index():
+    """
+    Возвращает индекс, применив к нему новые записи журнала изменений.
+    Если записей слишком много, часть из них вытеснена из кэша или
+    вызван reset_index, индекс перестраивается из БД.
+    """
+
+    values = cache.get_many((GENERATION_KEY, SEQUENCE_KEY))
+    generation = values.get(GENERATION_KEY)
+    sequence = values.get(SEQUENCE_KEY, 0)
+    index = _index
+    if index is None or (index.generation, index.sequence) != (
+        generation, sequence
+    ):
+        _sync_index(generation, sequence)
+    return _index
+
+
+def _filter_ranked(queryset, ranked):
+    """
+    Оставляет в ranked только рецепты queryset, проверяя их в БД
+    пачками по RECIPES_HAVE_BATCH_SIZE по мере чтения.
+    """
+
+    while True:
+        batch = list(islice(ranked, settings.RECIPES_HAVE_BATCH_SIZE))
+        if not batch:
+            return
+        found = set(queryset.filter(
+            id__in=[recipe_id for recipe_id, _ in batch]
+        ).order_by().values_list('id', flat=True))
+        yield from (pair for pair in batch if pair[0] in found)
+
+
+def filter_by_ingredients(queryset, ingredient_ids, index=None):
+    """
+    Отбирает до RECIPES_HAVE_LIMIT рецептов queryset, в которых есть
+    хотя бы один из ингредиентов ingredient_ids, и сортирует их по числу
+    недостающих ингредиентов (аннотация missing_ingredients). Если
+    queryset уже отфильтрован, рецепты из индекса проверяются в БД
+    пачками, пока не наберётся RECIPES_HAVE_LIMIT.
+    Рецепты с одинаковым числом недостающих ингредиентов сохраняют
+    порядок queryset, например по релевантности ?search=. Отбор до
+    RECIPES_HAVE_LIMIT при этом идёт по индексу, при равенстве - новые
+    рецепты, а не по релевантности.
+    """
+
+    if index is None:
+        index = get_index()
+    ranked = index.ranked(ingredient_ids)
+    if queryset.query.where:
+        ranked = _filter_ranked(queryset, ranked)
+    ranked = list(islice(ranked, settings.RECIPES_HAVE_LIMIT))
+    if not ranked:
+        return queryset.none()
+    buckets = defaultdict(list)
+    for recipe_id, missing in ranked:
+        buckets[missing].append(recipe_id)
+    return queryset.filter(
+        id__in=[recipe_id for recipe_id, _ in ranked]
+    ).annotate(missing_ingredients=Case(
+        *(
+            When(id__in=recipe_ids, then=Value(missing))
+            for missing, recipe_ids in buckets.items()
+        ),
+        output_field=IntegerField()
+    )).order_by('missing_ingredients', *queryset.query.order_by or ['-id'])
@@ -0,0 +1,204 @@
+import json
+import platform
+import random
+import time
+from datetime import datetime
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.synthetic import PREFIX, seed_dataset
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(timings, value):
+    return timings[min(len(timings) - 1, int(len(timings) * value / 100))]
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный бенчмарк API через тестовый клиент Django.
+    С --seed сначала заполняет БД синтетическими данными. Для каждого
+    сценария замеряет перцентили задержки, пропускную способность и
+    количество SQL запросов и сохраняет результат в JSON для сравнения
+    запусков. Работает с SQLite и PostgreSQL без сети.
+    """
+
+    help = 'Бенчмарк API на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true')
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--follows', type=int, default=10)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом'
+        )
+        parser.add_argument('--scenario', action='append')
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument(
+            '--compare', help='JSON предыдущего запуска для сравнения'
+        )
+
+    def get_scenarios(self, randomizer, user):
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        author_ids = list(Recipe.objects.order_by().values_list(
+            'author_id', flat=True
+        ).distinct()[:1000])
+        slugs = list(Tag.objects.values_list('slug', flat=True))
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        pages = max(1, len(recipe_ids) // 6)
+
+        def tags_query():
+            return '&'.join(
+                f'tags={slug}' for slug in randomizer.sample(
+                    slugs, min(2, len(slugs))
+                )
+            )
+
+        return {
+            'recipes_list': lambda: '/api/recipes/',
+            'recipes_list_deep_page': lambda: (
+                f'/api/recipes/?page={randomizer.randint(1, pages)}'
+            ),
+            'recipes_list_cursor': lambda: '/api/recipes/?pagination=cursor',
+            'recipes_detail': lambda: (
+                f'/api/recipes/{randomizer.choice(recipe_ids)}/'
+            ),
+            'recipes_filtered': lambda: (
+                f'/api/recipes/?{tags_query()}&is_favorited=1'
+            ),
+            'recipes_by_author': lambda: (
+                f'/api/recipes/?author={randomizer.choice(author_ids)}'
+            ),
+            'subscriptions': lambda: (
+                '/api/users/subscriptions/?recipes_limit=3'
+            ),
+            'ingredient_search': lambda: (
+                '/api/ingredients/?name='
+                + randomizer.choice(names)[:randomizer.randint(1, 4)]
+            ),
+            'shopping_cart_download': lambda: (
+                '/api/recipes/download_shopping_cart/'
+            ),
+        }
+
+    def run_scenario(self, client, make_url, options):
+        for _ in range(options['warmup']):
+            client.get(make_url())
+        timings = []
+        errors = 0
+        queries = 0
+        started = time.perf_counter()
+        for _ in range(options['requests']):
+            url = make_url()
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                request_started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - request_started)
+            queries += len(context.captured_queries)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        result = {
+            'requests': len(timings),
+            'errors': errors,
+            'rps': round(len(timings) / elapsed, 1),
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 2),
+            'max_ms': round(timings[-1] * 1000, 2),
+            'queries_per_request': round(queries / len(timings), 2),
+        }
+        for value in PERCENTILES:
+            result[f'p{value}_ms'] = round(
+                percentile(timings, value) * 1000, 2
+            )
+        return result
+
+    def compare(self, path, scenarios):
+        with open(path, encoding='utf-8') as file:
+            previous = json.load(file)['scenarios']
+        for name, result in scenarios.items():
+            if name not in previous:
+                continue
+            for key in ('p50_ms', 'p99_ms', 'rps'):
+                old, new = previous[name][key], result[key]
+                change = (new - old) / old * 100 if old else 0
+                self.stdout.write(
+                    f'{name} {key}: {old} -> {new} ({change:+.1f}%)'
+                )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля')
+        dataset = None
+        if options['seed']:
+            started = time.perf_counter()
+            dataset = seed_dataset(
+                users=options['users'],
+                recipes=options['recipes'],
+                follows=options['follows'],
+                favorites=options['favorites'],
+                carts=options['carts'],
+                seed=options['random_seed'],
+                stdout=self.stdout
+            )
+            dataset['seconds'] = round(time.perf_counter() - started, 1)
+        user = User.objects.filter(
+            username__startswith=PREFIX
+        ).order_by('id').first()
+        if user is None:
+            raise CommandError('Нет синтетических данных, запустите с --seed')
+        token, _ = Token.objects.get_or_create(user=user)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        randomizer = random.Random(options['random_seed'])
+        scenarios = self.get_scenarios(randomizer, user)
+        selected = options['scenario'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f'Неизвестные сценарии: {", ".join(unknown)}')
+        results = {}
+        for name in selected:
+            results[name] = self.run_scenario(
+                client, scenarios[name], options
+            )
+            self.stdout.write(
+                f'{name}: p50 {results[name]["p50_ms"]} мс, '
+                f'p99 {results[name]["p99_ms"]} мс, '
+                f'{results[name]["rps"]} rps, '
+                f'{results[name]["queries_per_request"]} SQL/запрос'
+            )
+        report = {
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'recipes': Recipe.objects.count(),
+                'users': User.objects.count(),
+                'requests': options['requests'],
+                'cold': options['cold'],
+                'dataset': dataset,
+            },
+            'scenarios': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Результаты сохранены в {options["output"]}')
+        if options['compare']:
+            self.compare(options['compare'], results)
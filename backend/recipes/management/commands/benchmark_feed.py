@@ -0,0 +1,130 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from recipes.feed import backfill_items, get_feed_ids
+from recipes.models import Recipe
+from users.models import Follow, User
+
+from .benchmark_tag_filter import PAGE_SIZE
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает чтение ленты подписок из таблицы FeedItem с JOIN рецептов
+    и подписок при каждом запросе. Данные создаются в транзакции,
+    которая откатывается после замеров. Для каждого читателя замеряется
+    первая страница и страница из середины ленты.
+    """
+
+    help = 'Бенчмарк ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--follows', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def seed(self, options, randomizer):
+        User.objects.bulk_create(
+            User(
+                username=f'bench-feed-{number}',
+                email=f'bench-feed-{number}@example.com'
+            ) for number in range(options['users'])
+        )
+        user_ids = list(User.objects.filter(
+            username__startswith='bench-feed-'
+        ).values_list('id', flat=True))
+        Follow.objects.bulk_create((
+            Follow(user_id=user_id, following_id=author_id)
+            for user_id in user_ids
+            for author_id in randomizer.sample(
+                user_ids, min(options['follows'], len(user_ids))
+            ) if author_id != user_id
+        ), batch_size=options['batch_size'])
+        batch_size = options['batch_size']
+        for start in range(0, options['recipes'], batch_size):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author_id=randomizer.choice(user_ids), name='bench',
+                    text='bench', image='recipes/bench.jpg', cooking_time=1
+                )
+                for _ in range(min(batch_size, options['recipes'] - start))
+            )
+        return user_ids
+
+    def fill_feeds(self, user_ids):
+        """Раздаёт в ленты все рецепты, а не только последние."""
+
+        followers = {}
+        for user_id, author_id in Follow.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', 'following_id').iterator():
+            followers.setdefault(author_id, []).append(user_id)
+        with override_settings(FEED_BACKFILL_SIZE=None):
+            return sum(
+                backfill_items(users, author_id)
+                for author_id, users in followers.items()
+            )
+
+    def measure(self, run, readers):
+        timings = []
+        for reader in readers:
+            started = time.perf_counter()
+            run(reader)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            sum(timings) / len(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.99)]
+        )
+
+    def handle(self, *args, **options):
+        randomizer = random.Random(options['seed'])
+        with transaction.atomic():
+            started = time.perf_counter()
+            user_ids = self.seed(options, randomizer)
+            self.stdout.write(
+                f'Пользователей: {len(user_ids)}, рецептов: '
+                f'{options["recipes"]}, заполнение: '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+            started = time.perf_counter()
+            created = self.fill_feeds(user_ids)
+            self.stdout.write(
+                f'Записей в лентах: {created}, '
+                f'раздача: {time.perf_counter() - started:.1f} с'
+            )
+            readers = randomizer.sample(
+                user_ids, min(options['queries'], len(user_ids))
+            )
+            recipes = Recipe.objects.all()
+
+            def join(reader):
+                feed = recipes.filter(
+                    author__following__user_id=reader
+                ).order_by('-id').values_list('id', flat=True)
+                page = list(feed[:PAGE_SIZE])
+                if page:
+                    list(feed.filter(id__lt=page[-1] // 2)[:PAGE_SIZE])
+
+            def feed_table(reader):
+                page = get_feed_ids(reader, None, PAGE_SIZE)
+                if page:
+                    get_feed_ids(reader, page[-1] // 2, PAGE_SIZE)
+
+            for label, run in (
+                ('JOIN рецептов и подписок', join),
+                ('таблица FeedItem', feed_table),
+            ):
+                mean, p50, p99 = self.measure(run, readers)
+                self.stdout.write(
+                    f'{label}: среднее {mean * 1000:.1f} мс, '
+                    f'p50 {p50 * 1000:.1f} мс, p99 {p99 * 1000:.1f} мс'
+                )
+            transaction.set_rollback(True)
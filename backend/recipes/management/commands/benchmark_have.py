@@ -0,0 +1,140 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q
+from recipes.ingredient_sets import (RecipeIngredientIndex,
+                                     filter_by_ingredients, load_rows)
+from recipes.models import Ingredient, IngredientMount, Recipe
+from users.models import User
+
+from .benchmark_tag_filter import PAGE_SIZE
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает подбор рецептов по имеющимся ингредиентам (?have=)
+    через индекс в памяти с реляционным делением в БД: GROUP BY по
+    IngredientMount с подсчётом совпавших и всех ингредиентов рецепта.
+    Данные создаются в транзакции, которая откатывается после замеров.
+    """
+
+    help = 'Бенчмарк подбора рецептов по имеющимся ингредиентам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def seed(self, options, randomizer):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'bench-have-{number}', measurement_unit='г')
+            for number in range(options['ingredients'])
+        )
+        ingredient_ids = list(Ingredient.objects.filter(
+            name__startswith='bench-have-'
+        ).values_list('id', flat=True))
+        # популярные ингредиенты встречаются в рецептах чаще
+        weights = [1 / (rank + 1) for rank in range(len(ingredient_ids))]
+        author = User.objects.create(
+            username='bench-have-author', email='bench-have@example.com'
+        )
+        batch_size = options['batch_size']
+        for start in range(0, options['recipes'], batch_size):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    author=author, name='bench', text='bench',
+                    image='recipes/bench.jpg', cooking_time=1
+                )
+                for _ in range(
+                    min(batch_size, options['recipes'] - start)
+                )
+            )
+            if not recipes or recipes[0].pk is None:
+                recipes = Recipe.objects.filter(
+                    author=author
+                ).order_by('-id')[:len(recipes)]
+            IngredientMount.objects.bulk_create((
+                IngredientMount(
+                    recipe_id=recipe.pk, ingredient_id=ingredient_id,
+                    amount=1
+                )
+                for recipe in recipes
+                for ingredient_id in set(randomizer.choices(
+                    ingredient_ids, weights, k=randomizer.randint(5, 30)
+                ))
+            ), batch_size=batch_size)
+        return ingredient_ids, weights
+
+    def measure(self, run, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            run(query)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            sum(timings) / len(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.99)]
+        )
+
+    def handle(self, *args, **options):
+        randomizer = random.Random(options['seed'])
+        with transaction.atomic():
+            started = time.perf_counter()
+            ingredient_ids, weights = self.seed(options, randomizer)
+            self.stdout.write(
+                f'Рецептов: {options["recipes"]}, '
+                f'ингредиентов: {len(ingredient_ids)}, '
+                f'заполнение: {time.perf_counter() - started:.1f} с'
+            )
+            tracemalloc.start()
+            started = time.perf_counter()
+            index = RecipeIngredientIndex(load_rows())
+            elapsed = time.perf_counter() - started
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            self.stdout.write(
+                f'Построение индекса: {elapsed:.1f} с, '
+                f'память: {memory / 2 ** 20:.0f} МБ'
+            )
+            queries = [
+                randomizer.choices(
+                    ingredient_ids, weights, k=randomizer.randint(3, 15)
+                ) for _ in range(options['queries'])
+            ]
+            recipes = Recipe.objects.order_by('-id')
+
+            def relational(query):
+                ranked = recipes.annotate(
+                    matched=Count(
+                        'recipe_ingredients',
+                        filter=Q(recipe_ingredients__ingredient_id__in=query)
+                    ),
+                    total=Count('recipe_ingredients')
+                ).filter(matched__gt=0).annotate(
+                    missing_ingredients=F('total') - F('matched')
+                ).order_by('missing_ingredients', '-id')
+                ranked.count()
+                list(ranked[:PAGE_SIZE])
+
+            def in_memory(query):
+                filtered = filter_by_ingredients(recipes, query, index)
+                filtered.count()
+                list(filtered[:PAGE_SIZE])
+
+            for label, run in (
+                ('GROUP BY в БД', relational),
+                ('индекс в памяти', in_memory),
+            ):
+                mean, p50, p99 = self.measure(run, queries)
+                self.stdout.write(
+                    f'{label}: среднее {mean * 1000:.1f} мс, '
+                    f'p50 {p50 * 1000:.1f} мс, p99 {p99 * 1000:.1f} мс'
+                )
+            transaction.set_rollback(True)
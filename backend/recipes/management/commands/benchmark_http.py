@@ -0,0 +1,119 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Recipe
+
+from .benchmark_api import PERCENTILES, percentile
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный бенчмарк запущенного сервера по HTTP при нескольких
+    уровнях параллельности. Позволяет сравнить пропускную способность
+    одного и того же набора запросов при запуске через gunicorn (WSGI)
+    и через ASGI сервер, например:
+    gunicorn foodgram.wsgi:application -w 4
+    gunicorn foodgram.asgi:application -w 4 -k uvicorn.workers.UvicornWorker
+    """
+
+    help = 'Бенчмарк запросов чтения API по HTTP при высокой параллельности'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=(1, 16, 64, 256)
+        )
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument(
+            '--path', action='append',
+            help='Запрашивать только указанные пути, например /api/tags/'
+        )
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', default='benchmark_http.json')
+
+    def get_paths(self, randomizer, count):
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        if not recipe_ids:
+            raise CommandError('В БД нет рецептов')
+        pages = max(1, len(recipe_ids) // 6)
+        makers = (
+            lambda: f'/api/recipes/?page={randomizer.randint(1, pages)}',
+            lambda: f'/api/recipes/{randomizer.choice(recipe_ids)}/',
+            lambda: '/api/ingredients/?name=' + randomizer.choice(
+                ('%D0%B0', '%D0%BC', '%D1%81', '%D0%BF')
+            ),
+        )
+        return [randomizer.choice(makers)() for _ in range(count)]
+
+    def fetch(self, url, timeout):
+        started = time.perf_counter()
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                response.read()
+                error = False
+        except HTTPError as exception:
+            error = exception.code >= 500
+        except (URLError, OSError):
+            error = True
+        return time.perf_counter() - started, error
+
+    def run_level(self, paths, concurrency, options):
+        urls = [options['base_url'].rstrip('/') + path for path in paths]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            results = list(executor.map(
+                lambda url: self.fetch(url, options['timeout']), urls
+            ))
+            elapsed = time.perf_counter() - started
+        timings = sorted(timing for timing, _ in results)
+        result = {
+            'requests': len(timings),
+            'errors': sum(error for _, error in results),
+            'rps': round(len(timings) / elapsed, 1),
+            'max_ms': round(timings[-1] * 1000, 2),
+        }
+        for value in PERCENTILES:
+            result[f'p{value}_ms'] = round(
+                percentile(timings, value) * 1000, 2
+            )
+        return result
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля')
+        randomizer = random.Random(options['random_seed'])
+        if options['path']:
+            paths = [
+                randomizer.choice(options['path'])
+                for _ in range(options['requests'])
+            ]
+        else:
+            paths = self.get_paths(randomizer, options['requests'])
+        results = {}
+        for concurrency in options['concurrency']:
+            result = self.run_level(paths, concurrency, options)
+            results[str(concurrency)] = result
+            self.stdout.write(
+                f'{concurrency} параллельно: {result["rps"]} rps, '
+                f'p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс, '
+                f'ошибок {result["errors"]}'
+            )
+        report = {
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'base_url': options['base_url'],
+                'label': options['label'],
+                'requests': options['requests'],
+            },
+            'concurrency': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
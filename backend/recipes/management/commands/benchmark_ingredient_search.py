@@ -0,0 +1,61 @@
+import csv
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.autocomplete import IngredientIndex
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    """
+    Замеряет скорость поиска по индексу ингредиентов в памяти.
+    Индекс строится из CSV файла, БД не используется.
+    """
+
+    help = 'Микробенчмарк поиска ингредиентов по индексу в памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=str(settings.BASE_DIR.parent / 'data' / 'ingredients.csv'),
+            help='CSV файл со строками "название,единица измерения"'
+        )
+        parser.add_argument('--queries', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as file:
+            ingredients = [
+                Ingredient(id=number, name=name, measurement_unit=unit)
+                for number, (name, unit) in enumerate(csv.reader(file), 1)
+            ]
+        started = time.perf_counter()
+        index = IngredientIndex(ingredients)
+        build_time = time.perf_counter() - started
+        randomizer = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['queries']):
+            name = randomizer.choice(ingredients).name
+            start = 0
+            if randomizer.random() < 0.2:
+                start = randomizer.randrange(len(name))
+            queries.append(name[start:start + randomizer.randint(1, 5)])
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, settings.INGREDIENT_SEARCH_LIMIT)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.stdout.write(
+            f'Ингредиентов: {len(index)}, построение индекса: '
+            f'{build_time * 1000:.1f} мс'
+        )
+        for label, value in (
+            ('среднее', sum(timings) / len(timings)),
+            ('p50', timings[len(timings) // 2]),
+            ('p99', timings[int(len(timings) * 0.99)]),
+            ('max', timings[-1]),
+        ):
+            self.stdout.write(f'{label}: {value * 1e6:.1f} мкс')
@@ -0,0 +1,146 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.scores import order_by_score, update_scores
+from users.models import User
+
+from .benchmark_tag_filter import PAGE_SIZE
+
+
+class Command(BaseCommand):
+    """
+    Замеряет полный и инкрементальный пересчёт рейтингов рецептов и
+    сравнивает страницу ?ordering=trending с сортировкой по числу
+    добавлений в избранное за последнюю неделю, посчитанному при
+    запросе. Данные создаются в транзакции, которая откатывается после
+    замеров.
+    """
+
+    help = 'Бенчмарк рейтингов популярности рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--events', type=int, default=300000)
+        parser.add_argument('--new-events', type=int, default=1000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def create_events(self, randomizer, user_ids, recipe_ids, count, days):
+        now = timezone.now()
+        pairs = set()
+        while len(pairs) < count:
+            pairs.add((
+                randomizer.choice(user_ids), randomizer.choice(recipe_ids)
+            ))
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create((
+                model(
+                    user_id=user_id, recipe_id=recipe_id,
+                    created_at=now - timedelta(
+                        seconds=randomizer.uniform(0, days * 24 * 60 * 60)
+                    )
+                ) for user_id, recipe_id in pairs
+                if randomizer.random() < 0.5
+            ), batch_size=5000, ignore_conflicts=True)
+        Recipe.objects.filter(
+            id__in={recipe_id for _, recipe_id in pairs}
+        ).update(updated_at=now)
+
+    def seed(self, options, randomizer):
+        User.objects.bulk_create(
+            User(
+                username=f'bench-scores-{number}',
+                email=f'bench-scores-{number}@example.com'
+            ) for number in range(options['users'])
+        )
+        user_ids = list(User.objects.filter(
+            username__startswith='bench-scores-'
+        ).values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, options['recipes'], batch_size):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author_id=randomizer.choice(user_ids), name='bench',
+                    text='bench', image='recipes/bench.jpg', cooking_time=1
+                )
+                for _ in range(min(batch_size, options['recipes'] - start))
+            )
+        recipe_ids = list(Recipe.objects.filter(
+            author_id__in=user_ids
+        ).values_list('id', flat=True))
+        self.create_events(
+            randomizer, user_ids, recipe_ids, options['events'], 90
+        )
+        return user_ids, recipe_ids
+
+    def measure(self, run, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            sum(timings) / len(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.99)]
+        )
+
+    def handle(self, *args, **options):
+        randomizer = random.Random(options['seed'])
+        with transaction.atomic():
+            started = time.perf_counter()
+            user_ids, recipe_ids = self.seed(options, randomizer)
+            self.stdout.write(
+                f'Рецептов: {len(recipe_ids)}, событий: '
+                f'{options["events"]}, заполнение: '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+            started = time.perf_counter()
+            updated = update_scores(full=True)
+            self.stdout.write(
+                f'Полный пересчёт: {updated} рецептов за '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+            self.create_events(
+                randomizer, user_ids, recipe_ids, options['new_events'], 1
+            )
+            started = time.perf_counter()
+            updated = update_scores()
+            self.stdout.write(
+                f'Инкрементальный пересчёт: {updated} рецептов за '
+                f'{time.perf_counter() - started:.2f} с'
+            )
+            recipes = Recipe.objects.all()
+            week_ago = timezone.now() - timedelta(days=7)
+
+            def at_request():
+                ranked = recipes.annotate(recent=Count(
+                    'favorites', filter=Q(favorites__created_at__gte=week_ago)
+                )).order_by('-recent', '-id')
+                ranked.count()
+                list(ranked[:PAGE_SIZE])
+
+            def stored():
+                ranked = order_by_score(recipes, 'trending')
+                ranked.count()
+                list(ranked[:PAGE_SIZE])
+
+            for label, run in (
+                ('подсчёт при запросе', at_request),
+                ('RecipeScore', stored),
+            ):
+                mean, p50, p99 = self.measure(run, options['queries'])
+                self.stdout.write(
+                    f'{label}: среднее {mean * 1000:.1f} мс, '
+                    f'p50 {p50 * 1000:.1f} мс, p99 {p99 * 1000:.1f} мс'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,117 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from recipes.models import Recipe
+from recipes.search import install_search, search_recipes
+from users.models import User
+
+from .benchmark_tag_filter import PAGE_SIZE
+
+WORDS = (
+    'борщ', 'суп', 'салат', 'котлеты', 'пирог', 'блины', 'каша', 'плов',
+    'омлет', 'запеканка', 'рагу', 'жаркое', 'пельмени', 'вареники', 'торт',
+    'картофель', 'морковь', 'свёкла', 'капуста', 'лук', 'чеснок', 'томаты',
+    'курица', 'говядина', 'свинина', 'рыба', 'грибы', 'сыр', 'творог',
+    'яблоки', 'вишня', 'сметана', 'масло', 'мука', 'яйца', 'молоко',
+    'обжарить', 'тушить', 'запечь', 'варить', 'нарезать', 'перемешать',
+    'быстрый', 'домашний', 'праздничный', 'постный', 'острый', 'сладкий',
+)
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает полнотекстовый поиск рецептов (?search=) с наивным
+    поиском через icontains по названию и описанию. Данные создаются
+    в транзакции, которая откатывается после замеров. Для каждого
+    запроса замеряется COUNT(*) и первая страница.
+    """
+
+    help = 'Бенчмарк полнотекстового поиска рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def seed(self, options, randomizer):
+        author = User.objects.create(
+            username='bench-search-author', email='bench-search@example.com'
+        )
+        batch_size = options['batch_size']
+        for start in range(0, options['recipes'], batch_size):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author=author,
+                    name=' '.join(
+                        randomizer.sample(WORDS, randomizer.randint(2, 4))
+                    ).capitalize(),
+                    text=' '.join(
+                        randomizer.choice(WORDS)
+                        for _ in range(randomizer.randint(20, 60))
+                    ),
+                    image='recipes/bench.jpg',
+                    cooking_time=1
+                )
+                for _ in range(
+                    min(batch_size, options['recipes'] - start)
+                )
+            )
+
+    def measure(self, run, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            run(query)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            sum(timings) / len(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.99)]
+        )
+
+    def handle(self, *args, **options):
+        randomizer = random.Random(options['seed'])
+        install_search()
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.seed(options, randomizer)
+            self.stdout.write(
+                f'Рецептов: {options["recipes"]}, БД: {connection.vendor}, '
+                f'заполнение: {time.perf_counter() - started:.1f} с'
+            )
+            queries = [
+                ' '.join(randomizer.sample(WORDS, randomizer.randint(1, 2)))
+                for _ in range(options['queries'])
+            ]
+            recipes = Recipe.objects.order_by('-id')
+
+            def icontains(query):
+                condition = Q()
+                for word in query.split():
+                    condition &= Q(name__icontains=word) | Q(
+                        text__icontains=word
+                    )
+                filtered = recipes.filter(condition)
+                filtered.count()
+                list(filtered[:PAGE_SIZE])
+
+            def full_text(query):
+                filtered = search_recipes(recipes, query)
+                filtered.count()
+                list(filtered[:PAGE_SIZE])
+
+            for label, run in (
+                ('icontains', icontains),
+                ('полнотекстовый поиск', full_text),
+            ):
+                mean, p50, p99 = self.measure(run, queries)
+                self.stdout.write(
+                    f'{label}: среднее {mean * 1000:.1f} мс, '
+                    f'p50 {p50 * 1000:.1f} мс, p99 {p99 * 1000:.1f} мс'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,132 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django_filters.rest_framework import FilterSet, filters
+from recipes.models import Recipe, Tag
+from recipes.tags import filter_by_tags
+from users.models import User
+
+PAGE_SIZE = 6
+
+
+class LegacyRecipeFilter(FilterSet):
+    """Прежний фильтр по тэгам: JOIN по M2M и DISTINCT."""
+
+    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+
+    class Meta:
+        model = Recipe
+        fields = ('tags',)
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает прежний фильтр рецептов по тэгам с фильтром через EXISTS.
+    Данные создаются в транзакции, которая откатывается после замеров.
+    Для каждого запроса замеряется COUNT(*) и первая страница.
+    """
+
+    help = 'Бенчмарк фильтрации рецептов по тэгам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def seed(self, options, randomizer):
+        Tag.objects.bulk_create(
+            Tag(name=f'bench-tag-{number}', slug=f'bench-tag-{number}')
+            for number in range(options['tags'])
+        )
+        tag_ids = list(Tag.objects.filter(
+            slug__startswith='bench-tag-'
+        ).values_list('id', flat=True))
+        author = User.objects.create(
+            username='bench-tag-author', email='bench@example.com'
+        )
+        batch_size = options['batch_size']
+        for start in range(0, options['recipes'], batch_size):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    author=author,
+                    name=f'bench-{number}',
+                    text='bench',
+                    image='recipes/bench.jpg',
+                    cooking_time=1
+                )
+                for number in range(
+                    start, min(start + batch_size, options['recipes'])
+                )
+            )
+            if not recipes or recipes[0].pk is None:
+                recipes = Recipe.objects.filter(
+                    author=author
+                ).order_by('-id')[:len(recipes)]
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe in recipes
+                for tag_id in randomizer.sample(
+                    tag_ids, randomizer.randint(1, min(3, len(tag_ids)))
+                )
+            )
+        return dict(Tag.objects.values_list('slug', 'id'))
+
+    def measure(self, run, queries):
+        timings = []
+        for slugs in queries:
+            started = time.perf_counter()
+            run(slugs)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            sum(timings) / len(timings),
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.99)]
+        )
+
+    def handle(self, *args, **options):
+        randomizer = random.Random(options['seed'])
+        with transaction.atomic():
+            started = time.perf_counter()
+            tag_map = self.seed(options, randomizer)
+            slugs = sorted(
+                slug for slug in tag_map if slug.startswith('bench-tag-')
+            )
+            self.stdout.write(
+                f'Рецептов: {options["recipes"]}, тэгов: {len(slugs)}, '
+                f'заполнение: {time.perf_counter() - started:.1f} с'
+            )
+            queries = [
+                randomizer.sample(slugs, randomizer.randint(1, 3))
+                for _ in range(options['queries'])
+            ]
+            recipes = Recipe.objects.order_by('-id')
+
+            def legacy(query):
+                data = {'tags': query}
+                filtered = LegacyRecipeFilter(data, queryset=recipes).qs
+                filtered.count()
+                list(filtered[:PAGE_SIZE])
+
+            def exists(query, match_all=False):
+                filtered = filter_by_tags(
+                    recipes, query, match_all, tag_map
+                )
+                filtered.count()
+                list(filtered[:PAGE_SIZE])
+
+            for label, run in (
+                ('AllValuesMultipleFilter', legacy),
+                ('EXISTS, любой тэг', exists),
+                ('EXISTS, все тэги', lambda query: exists(query, True)),
+            ):
+                mean, p50, p99 = self.measure(run, queries)
+                self.stdout.write(
+                    f'{label}: среднее {mean * 1000:.1f} мс, '
+                    f'p50 {p50 * 1000:.1f} мс, p99 {p99 * 1000:.1f} мс'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,167 @@
+import re
+
+from api.views import RecipeModelViewSet
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from recipes.models import (Favorite, IngredientMount, Recipe, ShoppingCart,
+                            ShoppingListItem)
+from recipes.tags import filter_by_tags
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from users.models import Follow, User
+from users.views import FollowListApiView
+
+PAGE_SIZE = 6
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (?P<table>\w+)'),
+    'sqlite': re.compile(
+        r'\bSCAN (?:TABLE )?(?P<table>\w+)(?!.*\bUSING\b)'
+    ),
+}
+
+
+class Command(BaseCommand):
+    """
+    Выполняет EXPLAIN для запросов горячих путей API и завершается
+    с ошибкой, если какой-либо из них последовательно читает таблицу
+    размером не меньше --min-rows строк.
+    Поддерживаются PostgreSQL и SQLite. В SQLite обход основной таблицы
+    в порядке первичного ключа с LIMIT и без сортировки (SCAN без
+    TEMP B-TREE) не считается последовательным чтением.
+    """
+
+    help = 'Проверка планов запросов горячих путей API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=1000)
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help='Выводить планы всех запросов'
+        )
+
+    def get_table_size(self, table):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [table]
+                )
+            else:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+                )
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def is_ordered_scan(self, queryset, plan):
+        return (
+            connection.vendor == 'sqlite'
+            and queryset.query.high_mark is not None
+            and 'TEMP B-TREE' not in plan
+        )
+
+    def get_view_queryset(self, view_class, path, user):
+        request = Request(APIRequestFactory().get(path))
+        request.user = user
+        view = view_class(
+            request=request, args=(), kwargs={}, format_kwarg=None,
+            action='list'
+        )
+        return view.filter_queryset(view.get_queryset())
+
+    def get_queries(self, user, recipe, author):
+        recipe_ids = [recipe.id]
+        author_ids = [author.id]
+        return (
+            ('Список рецептов', self.get_view_queryset(
+                RecipeModelViewSet, '/api/recipes/', user
+            )[:PAGE_SIZE]),
+            ('Рецепты автора', self.get_view_queryset(
+                RecipeModelViewSet, f'/api/recipes/?author={author.id}', user
+            )[:PAGE_SIZE]),
+            ('Избранные рецепты', self.get_view_queryset(
+                RecipeModelViewSet, '/api/recipes/?is_favorited=1', user
+            )[:PAGE_SIZE]),
+            ('Рецепты по тэгам', filter_by_tags(
+                Recipe.objects.all(),
+                recipe.tags.values_list('slug', flat=True)
+            )[:PAGE_SIZE]),
+            ('Рецепт', Recipe.objects.filter(pk=recipe.id)),
+            ('Ингредиенты рецептов', IngredientMount.objects.filter(
+                recipe_id__in=recipe_ids
+            ).select_related('ingredient')),
+            ('Тэги рецептов', Recipe.tags.through.objects.filter(
+                recipe_id__in=recipe_ids
+            )),
+            ('Рецепт в избранном', Favorite.objects.filter(
+                user=user, recipe=recipe
+            )),
+            ('Рецепт в списке покупок', ShoppingCart.objects.filter(
+                user=user, recipe=recipe
+            )),
+            ('Подписка', Follow.objects.filter(user=user, following=author)),
+            ('Подписки', self.get_view_queryset(
+                FollowListApiView, '/api/users/subscriptions/', user
+            )[:PAGE_SIZE]),
+            ('Последние рецепты авторов', Recipe.objects.filter(
+                author_id__in=author_ids,
+                pk__in=Subquery(
+                    Recipe.objects.filter(
+                        author=OuterRef('author')
+                    ).order_by('-id').values('pk')[:3]
+                )
+            )),
+            ('Список покупок', ShoppingListItem.objects.filter(
+                user=user
+            ).select_related('ingredient')),
+        )
+
+    def get_large_scans(self, queryset, plan, min_rows):
+        """Возвращает последовательно читаемые таблицы от min_rows строк."""
+
+        scanned = {
+            match.group('table') for match in self.pattern.finditer(plan)
+        } & self.tables
+        if self.is_ordered_scan(queryset, plan):
+            scanned.discard(queryset.model._meta.db_table)
+        large = []
+        for table in sorted(scanned):
+            if table not in self.sizes:
+                self.sizes[table] = self.get_table_size(table)
+            if self.sizes[table] >= min_rows:
+                large.append(f'{table} ({self.sizes[table]} строк)')
+        return large
+
+    def handle(self, *args, **options):
+        self.pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if self.pattern is None:
+            raise CommandError(
+                f'EXPLAIN не поддерживается для {connection.vendor}'
+            )
+        recipe = Recipe.objects.select_related('author').first()
+        user = User.objects.filter(shopping_cart__isnull=False).first()
+        if recipe is None or user is None:
+            raise CommandError(
+                'Нужны хотя бы один рецепт и один список покупок'
+            )
+        self.tables = set(connection.introspection.table_names())
+        self.sizes = {}
+        failures = []
+        for label, queryset in self.get_queries(user, recipe, recipe.author):
+            plan = queryset.explain()
+            large = self.get_large_scans(queryset, plan, options['min_rows'])
+            if large:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(
+                    f'{label}: последовательное чтение {", ".join(large)}'
+                ))
+            else:
+                self.stdout.write(f'{label}: OK')
+            if large or options['verbose_plans']:
+                self.stdout.write(plan)
+        if failures:
+            raise CommandError(
+                f'Последовательное чтение больших таблиц: {len(failures)}'
+            )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from recipes.images import generate_thumbnails
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Создаёт миниатюры для рецептов, у которых их нет или они устарели,
+    например если процесс был перезапущен до завершения фоновой задачи.
+    """
+
+    help = 'Создаёт недостающие миниатюры изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать миниатюры для всех рецептов'
+        )
+
+    def handle(self, *args, **options):
+        generated = 0
+        failed = 0
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'image_thumbnails'
+        )
+        for recipe in recipes.iterator():
+            if (
+                options['force']
+                or recipe.image_thumbnails.get('source') != recipe.image.name
+            ):
+                try:
+                    generate_thumbnails(recipe.id, force=options['force'])
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'Рецепт {recipe.id}: {error}')
+                    continue
+                generated += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры созданы для рецептов: {generated}, ошибок: {failed}'
+        ))
@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipes.models import Ingredient
+from recipes.shopping_list import bump_global_version
+from recipes.versions import bump_table_version
+
+JSON_READ_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    """
+    Потоково читает JSON массив объектов {"name", "measurement_unit"},
+    не загружая файл в память целиком.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = file.read(JSON_READ_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON массив')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(JSON_READ_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный JSON')
+            buffer += chunk
+            continue
+        yield item['name'], item['measurement_unit']
+        buffer = buffer[end:]
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+
+class Command(BaseCommand):
+    """
+    Загружает справочник ингредиентов из CSV или JSON файла.
+    Файл читается порциями, существующие названия пропускаются,
+    поэтому повторный запуск не создаёт дубликатов. На PostgreSQL
+    данные загружаются через COPY во временную таблицу.
+    """
+
+    help = 'Загружает ингредиенты из CSV или JSON файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к CSV или JSON файлу')
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            help='Формат файла, по умолчанию определяется по расширению'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Не использовать COPY даже на PostgreSQL'
+        )
+
+    def get_rows(self, file, file_format):
+        max_length = Ingredient._meta.get_field('name').max_length
+        seen = set()
+        for name, unit in READERS[file_format](file):
+            name, unit = name.strip(), unit.strip()
+            if not name or len(name) > max_length or name in seen:
+                self.skipped += 1
+                continue
+            seen.add(name)
+            self.processed += 1
+            yield name, unit
+
+    def insert_chunk(self, chunk):
+        names = [name for name, _ in chunk]
+        existing = set(Ingredient.objects.filter(
+            name__in=names
+        ).values_list('name', flat=True))
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=unit)
+             for name, unit in chunk if name not in existing],
+            ignore_conflicts=True
+        )
+
+    def copy_chunk(self, cursor, chunk):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(chunk)
+        buffer.seek(0)
+        cursor.copy_expert(
+            'COPY tmp_ingredients (name, measurement_unit) '
+            'FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+    def load_with_copy(self, chunks):
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE tmp_ingredients '
+                '(name varchar(100), measurement_unit varchar(100)) '
+                'ON COMMIT DROP'
+            )
+            for chunk in chunks:
+                self.copy_chunk(cursor, chunk)
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT name, measurement_unit FROM tmp_ingredients '
+                'ON CONFLICT (name) DO NOTHING'
+            )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path.suffix}')
+        use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        self.skipped = 0
+        self.processed = 0
+        before = Ingredient.objects.count()
+        started = time.perf_counter()
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            rows = self.get_rows(file, file_format)
+            chunks = iter(
+                lambda: list(islice(rows, options['chunk_size'])), []
+            )
+            if use_copy:
+                self.load_with_copy(chunks)
+            else:
+                for chunk in chunks:
+                    self.insert_chunk(chunk)
+        elapsed = time.perf_counter() - started
+        bump_table_version(Ingredient)
+        bump_global_version()
+        created = Ingredient.objects.count() - before
+        throughput = self.processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {self.processed}, добавлено ингредиентов: '
+            f'{created}, пропущено строк: {self.skipped}, '
+            f'время: {elapsed:.2f} с ({throughput:.0f} строк/с), '
+            f'COPY: {"да" if use_copy else "нет"}'
+        ))
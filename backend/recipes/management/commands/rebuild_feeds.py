@@ -0,0 +1,58 @@
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from recipes.feed import backfill_items
+from recipes.models import FeedItem
+from users.models import Follow, User
+
+
+class Command(BaseCommand):
+    """
+    Пересобирает таблицу FeedItem: в ленту каждого подписчика попадают
+    последние FEED_BACKFILL_SIZE рецептов авторов, на которых он
+    подписан. Без --user флаг feed_pull пересчитывается по текущему
+    количеству подписчиков авторов.
+    """
+
+    help = 'Пересобирает ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='id пользователя, можно указать несколько раз'
+        )
+
+    def handle(self, *args, **options):
+        users = options['users']
+        with transaction.atomic():
+            items = FeedItem.objects.all()
+            follows = Follow.objects.filter(following__feed_pull=False)
+            if users:
+                items = items.filter(user__in=users)
+                follows = follows.filter(user__in=users)
+            else:
+                User.objects.update(feed_pull=ExpressionWrapper(
+                    Q(followers_count__gte=settings.FEED_PULL_THRESHOLD),
+                    output_field=BooleanField()
+                ))
+            items.delete()
+            created = 0
+            for author_id, group in groupby(
+                follows.order_by('following_id').values_list(
+                    'following_id', 'user_id'
+                ).iterator(),
+                key=itemgetter(0)
+            ):
+                created += backfill_items(
+                    [user_id for _, user_id in group], author_id
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {created}'
+        ))
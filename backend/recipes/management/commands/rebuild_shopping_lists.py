@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes.models import ShoppingListItem
+from recipes.shopping_list import aggregate_shopping_lists, bump_global_version
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает таблицу ShoppingListItem по ShoppingCart и
+    IngredientMount. С флагом --verify только сравнивает таблицу
+    с пересчитанными значениями и завершается с ошибкой при расхождении.
+    """
+
+    help = 'Пересобирает и проверяет агрегированные списки покупок'
+    batch_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить таблицу, не изменяя её'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='id пользователя, можно указать несколько раз'
+        )
+
+    def get_drift(self, expected, users):
+        items = ShoppingListItem.objects.all()
+        if users:
+            items = items.filter(user__in=users)
+        actual = {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total in items.values_list(
+                'user', 'ingredient', 'total_amount'
+            ).iterator()
+        }
+        return {
+            key: (actual.get(key), expected.get(key))
+            for key in set(actual) | set(expected)
+            if actual.get(key) != expected.get(key)
+        }
+
+    def rebuild(self, expected, users):
+        with transaction.atomic():
+            items = ShoppingListItem.objects.all()
+            if users:
+                items = items.filter(user__in=users)
+            items.delete()
+            ShoppingListItem.objects.bulk_create(
+                (ShoppingListItem(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=total
+                ) for (user_id, ingredient_id), total in expected.items()),
+                batch_size=self.batch_size
+            )
+        bump_global_version()
+
+    def handle(self, *args, **options):
+        users = options['users']
+        expected = aggregate_shopping_lists(users)
+        drift = self.get_drift(expected, users)
+        for (user_id, ingredient_id), (actual, total) in sorted(
+            drift.items()
+        ):
+            self.stdout.write(
+                f'user={user_id} ingredient={ingredient_id}: '
+                f'в таблице {actual}, ожидается {total}'
+            )
+        if options['verify']:
+            if drift:
+                raise CommandError(f'Найдено расхождений: {len(drift)}')
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        self.rebuild(expected, users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в списках покупок: {len(expected)}, '
+            f'исправлено расхождений: {len(drift)}'
+        ))
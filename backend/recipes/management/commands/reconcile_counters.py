@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from recipes.counters import COUNTERS, get_counter_drift, reconcile_counter
+
+
+class Command(BaseCommand):
+    """
+    Сверяет денормализованные счётчики Recipe и User с реальным
+    количеством записей и исправляет их. С флагом --verify только
+    сообщает о расхождениях.
+    """
+
+    help = 'Сверяет и пересчитывает счётчики рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить счётчики, не изменяя их'
+        )
+
+    def handle(self, *args, **options):
+        total_drift = 0
+        for model, field, source, relation in COUNTERS:
+            drift = get_counter_drift(model, field, source, relation)
+            total_drift += drift
+            self.stdout.write(
+                f'{model.__name__}.{field}: расхождений {drift}'
+            )
+            if drift and not options['verify']:
+                reconcile_counter(model, field, source, relation)
+        if options['verify'] and total_drift:
+            raise CommandError(f'Найдено расхождений: {total_drift}')
+        self.stdout.write(self.style.SUCCESS('Счётчики в порядке'))
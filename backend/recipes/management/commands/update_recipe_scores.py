@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.models import RecipeScore
+from recipes.scores import update_scores
+from recipes.versions import bump_table_version
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает рейтинги рецептов для ?ordering=popular|trending.
+    По умолчанию пересчитываются только рецепты с событиями после
+    предыдущего запуска, поэтому команду можно запускать по расписанию,
+    например раз в несколько минут из cron.
+    """
+
+    help = 'Пересчитывает рейтинги популярности рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать рейтинги всех рецептов'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = update_scores(full=options['full'])
+        if updated:
+            bump_table_version(RecipeScore)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рейтингов: {updated} '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
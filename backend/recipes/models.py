@@ -1,5 +1,7 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
 
@@ -73,6 +75,16 @@ class Ingredient(models.Model):
         return self.name
 
 
+class RecipeManager(models.Manager):
+    """
+    Менеджер рецептов: поле search_vector нужно только для поиска в БД
+    и не загружается вместе с рецептом.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 class Recipe(models.Model):
     """
     Модель для рецептов.
@@ -104,6 +116,13 @@ class Recipe(models.Model):
         upload_to='recipes/',
         help_text='Выберите изображение'
     )
+    image_thumbnails = models.JSONField(
+        'миниатюры изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Имена файлов миниатюр по форматам и ширине'
+    )
     tags = models.ManyToManyField(
         Tag,
         verbose_name='Тэг',
@@ -120,11 +139,50 @@ class Recipe(models.Model):
         help_text='Введите время приготовления',
         validators=(MinValueValidator(1),)
     )
+    favorites_count = models.PositiveIntegerField(
+        'в избранном',
+        default=0,
+        editable=False,
+        help_text='Сколько раз рецепт добавлен в избранное'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'в списках покупок',
+        default=0,
+        editable=False,
+        help_text='Сколько раз рецепт добавлен в список покупок'
+    )
+    created_at = models.DateTimeField(
+        'дата публикации',
+        default=timezone.now,
+        editable=False,
+        help_text='Время публикации рецепта'
+    )
+    updated_at = models.DateTimeField(
+        'дата изменения',
+        auto_now=True,
+        db_index=True,
+        help_text='Время последнего изменения рецепта или его счётчиков'
+    )
+    search_vector = SearchVectorField(
+        'поисковый вектор',
+        null=True,
+        editable=False,
+        help_text='Заполняется триггером БД из названия и описания'
+    )
+
+    objects = RecipeManager()
 
     class Meta:
         ordering = ['-id']
+        base_manager_name = 'objects'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('author', '-id'),
+                name='recipe_author_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -152,6 +210,12 @@ class ShoppingCart(models.Model):
         verbose_name='Рецепт',
         help_text='Выберите рецепты'
     )
+    created_at = models.DateTimeField(
+        'дата добавления',
+        default=timezone.now,
+        editable=False,
+        help_text='Время добавления рецепта в список покупок'
+    )
 
     class Meta:
         ordering = ['-id']
@@ -185,7 +249,8 @@ class IngredientMount(models.Model):
         Recipe, on_delete=models.CASCADE,
         related_name='recipe_ingredients',
         verbose_name='Рецепт',
-        help_text='Выберите рецепт'
+        help_text='Выберите рецепт',
+        db_index=False
     )
     amount = models.PositiveIntegerField(
         verbose_name='Количество ингредиента',
@@ -197,6 +262,19 @@ class IngredientMount(models.Model):
         ordering = ['-id']
         verbose_name = 'Продукты в рецепте'
         verbose_name_plural = 'Продукты в рецепте'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient',),
+                name='unique_recipe_ingredient',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('recipe',),
+                include=('ingredient', 'amount'),
+                name='ingredientmount_recipe_cover',
+            ),
+        )
 
     def __str__(self):
         return (
@@ -226,6 +304,12 @@ class Favorite(models.Model):
         verbose_name='Рецепт',
         help_text='Выберите рецепт'
     )
+    created_at = models.DateTimeField(
+        'дата добавления',
+        default=timezone.now,
+        editable=False,
+        help_text='Время добавления рецепта в избранное'
+    )
 
     class Meta:
         ordering = ['-id']
@@ -240,3 +324,137 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'Пользователь {self.user} выбрал рецепт {self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Агрегированный список покупок пользователя.
+    Хранит общее количество ингредиента (ingredient) по всем рецептам
+    в списке покупок пользователя (user). Обновляется инкрементально
+    при изменении списка покупок и ингредиентов рецептов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Пользователь',
+        help_text='Выберите пользователя'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+        help_text='Выберите ингредиент'
+    )
+    total_amount = models.IntegerField(
+        'общее количество',
+        default=0,
+        help_text='Общее количество ингредиента в списке покупок'
+    )
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Продукты в списке покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient',),
+                name='unique_user_shopping_list_ingredient',
+            ),
+        )
+
+    def __str__(self):
+        return (
+            f'{self.ingredient} в списке покупок {self.user}'
+            f' = {self.total_amount}'
+        )
+
+
+class FeedItem(models.Model):
+    """
+    Рецепт (recipe) автора (author) в ленте подписчика (user).
+    Записи создаются при публикации рецепта для каждого подписчика
+    автора, лента читается по индексу (user, recipe).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Подписчик',
+        help_text='Выберите пользователя',
+        db_index=False
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт',
+        help_text='Выберите рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта',
+        help_text='Выберите автора рецепта',
+        db_index=False
+    )
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Рецепт в ленте'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe',),
+                name='unique_user_feed_recipe',
+            ),
+        )
+
+    def __str__(self):
+        return f'Рецепт {self.recipe_id} в ленте {self.user_id}'
+
+
+class RecipeScore(models.Model):
+    """
+    Рейтинги рецепта для сортировки ?ordering=popular|trending.
+    Хранится логарифм суммы весов событий рецепта, затухающих со
+    временем, см. recipes.scores. Пересчитывается командой
+    update_recipe_scores.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт',
+        help_text='Выберите рецепт'
+    )
+    popular = models.FloatField(
+        'популярность',
+        db_index=True,
+        help_text='Рейтинг с медленным затуханием'
+    )
+    trending = models.FloatField(
+        'тренд',
+        db_index=True,
+        help_text='Рейтинг с быстрым затуханием'
+    )
+    computed_at = models.DateTimeField(
+        'дата пересчёта',
+        null=True,
+        db_index=True,
+        help_text='Время последнего пересчёта рейтингов'
+    )
+
+    class Meta:
+        ordering = ['-popular']
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+
+    def __str__(self):
+        return f'Рейтинг рецепта {self.recipe_id}'
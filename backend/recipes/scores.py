@@ -0,0 +1,264 @@
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db import NotSupportedError, connection
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from users.models import Follow
+
+from .models import Favorite, Recipe, RecipeScore, ShoppingCart
+
+# Рейтинг рецепта - сумма весов его событий, затухающих вдвое за период
+# полураспада: sum(w * 2 ** ((t - now) / h)). Множитель 2 ** (-now / h)
+# общий для всех рецептов и не влияет на порядок, поэтому хранится
+# ln(sum(w * 2 ** ((t - EPOCH) / h))): рейтинг рецепта без новых событий
+# не нужно пересчитывать, чтобы сравнивать его с остальными.
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+# сортировка: поле RecipeScore
+ORDERINGS = {
+    'popular': 'popular',
+    'trending': 'trending',
+}
+# рейтинг рецепта без событий и без строки RecipeScore
+NO_SCORE = -math.inf
+# exp от меньших показателей неотличим от нуля, а в PostgreSQL
+# вызывает ошибку underflow
+MIN_EXPONENT = -700
+# секунды от начала эпохи Unix для столбца даты
+SECONDS = {
+    'postgresql': 'EXTRACT(EPOCH FROM {column})::float8',
+    'sqlite': '(julianday({column}) - 2440587.5) * 86400.0',
+}
+
+
+def get_rates():
+    """Скорость затухания (в секунду) для каждого поля RecipeScore."""
+
+    return {
+        field: math.log(2) / (
+            settings.RECIPE_SCORE_HALF_LIVES[field] * 60 * 60
+        )
+        for field in ORDERINGS.values()
+    }
+
+
+def log_sum_exp(values):
+    values = list(values)
+    if not values:
+        return NO_SCORE
+    largest = max(values)
+    return largest + math.log(
+        sum(math.exp(value - largest) for value in values)
+    )
+
+
+def event_terms(kind, moments, rates):
+    """
+    Слагаемые рейтингов для событий kind в моменты moments. События
+    с неположительным весом в RECIPE_SCORE_WEIGHTS не учитываются.
+    """
+
+    weight = settings.RECIPE_SCORE_WEIGHTS[kind]
+    if weight <= 0:
+        return {field: [] for field in rates}
+    return {
+        field: [
+            math.log(weight) + rate * (moment - EPOCH).total_seconds()
+            for moment in moments
+        ] for field, rate in rates.items()
+    }
+
+
+def _terms_sql(kind, column, rates):
+    """
+    Выражения слагаемых рейтингов для события kind в момент column и
+    их параметры или None, если событие не учитывается.
+    """
+
+    weight = settings.RECIPE_SCORE_WEIGHTS[kind]
+    if weight <= 0:
+        return None
+    try:
+        seconds = SECONDS[connection.vendor].format(column=column)
+    except KeyError:
+        raise NotSupportedError(
+            f'Рейтинги рецептов не поддерживаются для {connection.vendor}'
+        )
+    sql = ', '.join(
+        f'%s + %s * ({seconds} - %s) AS {field}' for field in rates
+    )
+    params = []
+    for rate in rates.values():
+        params.extend((math.log(weight), rate, EPOCH.timestamp()))
+    return sql, params
+
+
+def _log_sum_exp_sql(terms, key, rates):
+    """
+    Запрос, сворачивающий слагаемые из CTE terms по столбцу key в
+    ln(sum(exp(x))) без переполнения: max(x) + ln(sum(exp(x - max(x)))).
+    """
+
+    largest = ', '.join(f'MAX({field}) AS {field}' for field in rates)
+    total = ', '.join(
+        f'm.{field} + LN(SUM(CASE WHEN t.{field} - m.{field} < '
+        f'{MIN_EXPONENT} THEN 0 ELSE EXP(t.{field} - m.{field}) END)) '
+        f'AS {field}' for field in rates
+    )
+    fields = ', '.join(f'm.{field}' for field in rates)
+    return (
+        f'SELECT m.{key}, {total} FROM {terms} t JOIN ('
+        f'SELECT {key}, {largest} FROM {terms} GROUP BY {key}'
+        f') m ON m.{key} = t.{key} GROUP BY m.{key}, {fields}'
+    )
+
+
+def save_scores(low, high, since, computed_at):
+    """
+    Пересчитывает одним запросом рейтинги рецептов с id от low до high,
+    изменённых не раньше since, по публикации рецепта, добавлениям в
+    избранное и список покупок и подпискам на автора.
+    """
+
+    rates = get_rates()
+    fields = ', '.join(rates)
+    recipe = Recipe._meta.db_table
+    batch = (
+        f'SELECT id, author_id, created_at FROM {recipe} '
+        f'WHERE id >= %s AND id <= %s'
+    )
+    params = [low, high]
+    if since is not None:
+        batch += (
+            f' AND (updated_at >= %s OR author_id IN (SELECT following_id '
+            f'FROM {Follow._meta.db_table} WHERE created_at >= %s))'
+        )
+        params.extend(
+            [connection.ops.adapt_datetimefield_value(since)] * 2
+        )
+    ctes = [f'batch AS ({batch})']
+    branches = []
+    created = _terms_sql('created', 'b.created_at', rates)
+    if created is not None:
+        branches.append((
+            f'SELECT b.id AS recipe_id, {created[0]} FROM batch b',
+            created[1]
+        ))
+    for kind, model in (('favorite', Favorite), ('cart', ShoppingCart)):
+        terms = _terms_sql(kind, 'e.created_at', rates)
+        if terms is not None:
+            branches.append((
+                f'SELECT e.recipe_id, {terms[0]} '
+                f'FROM {model._meta.db_table} e '
+                f'JOIN batch b ON b.id = e.recipe_id',
+                terms[1]
+            ))
+    follow = _terms_sql('follow', 'e.created_at', rates)
+    if follow is not None:
+        ctes.append(
+            f'follow_terms AS (SELECT e.following_id AS author_id, '
+            f'{follow[0]} FROM {Follow._meta.db_table} e WHERE '
+            f'e.following_id IN (SELECT author_id FROM batch))'
+        )
+        params.extend(follow[1])
+        ctes.append(
+            f'authors AS ('
+            f'{_log_sum_exp_sql("follow_terms", "author_id", rates)})'
+        )
+        branches.append((
+            f'SELECT b.id AS recipe_id, {fields} '
+            f'FROM batch b JOIN authors a ON a.author_id = b.author_id',
+            []
+        ))
+    scores = ''
+    if branches:
+        ctes.append('terms AS ({})'.format(
+            ' UNION ALL '.join(sql for sql, _ in branches)
+        ))
+        for _, branch_params in branches:
+            params.extend(branch_params)
+        ctes.append(
+            f'scores AS ({_log_sum_exp_sql("terms", "recipe_id", rates)})'
+        )
+        scores = 'LEFT JOIN scores s ON s.recipe_id = b.id'
+        values = ', '.join(
+            f'COALESCE(s.{field}, %s)' for field in rates
+        )
+    else:
+        values = ', '.join('%s' for _ in rates)
+    params.extend(NO_SCORE for _ in rates)
+    params.append(connection.ops.adapt_datetimefield_value(computed_at))
+    updates = ', '.join(
+        f'{field} = excluded.{field}' for field in (*rates, 'computed_at')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH {", ".join(ctes)} '
+            f'INSERT INTO {RecipeScore._meta.db_table} '
+            f'(recipe_id, {fields}, computed_at) '
+            f'SELECT b.id, {values}, %s FROM batch b {scores} WHERE 1 = 1 '
+            f'ON CONFLICT (recipe_id) DO UPDATE SET {updates}',
+            params
+        )
+
+
+def update_scores(full=False):
+    """
+    Пересчитывает рейтинги рецептов пачками по RECIPE_SCORE_BATCH_SIZE.
+    Без full пересчитываются только рецепты, изменённые после
+    предыдущего пересчёта (избранное и список покупок обновляют
+    Recipe.updated_at), и рецепты авторов с новыми подписчиками.
+    Отписки учитываются при пересчёте с full. Возвращает число рецептов.
+    """
+
+    started = timezone.now()
+    recipes = Recipe.objects.order_by('id')
+    since = RecipeScore.objects.aggregate(last=Max('computed_at'))['last']
+    if full:
+        since = None
+    if since is not None:
+        recipes = recipes.filter(
+            Q(updated_at__gte=since)
+            | Q(author__in=Follow.objects.filter(
+                created_at__gte=since
+            ).values('following'))
+        )
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    size = settings.RECIPE_SCORE_BATCH_SIZE
+    for start in range(0, len(recipe_ids), size):
+        batch = recipe_ids[start:start + size]
+        save_scores(batch[0], batch[-1], since, started)
+    return len(recipe_ids)
+
+
+def create_scores(recipes):
+    """
+    Рейтинги новых рецептов по событию публикации, одним bulk_create.
+    computed_at не заполняется, чтобы не сдвигать время последнего
+    пересчёта.
+    """
+
+    rates = get_rates()
+    RecipeScore.objects.bulk_create(
+        RecipeScore(recipe=recipe, computed_at=None, **{
+            field: log_sum_exp(values) for field, values in event_terms(
+                'created', [recipe.created_at], rates
+            ).items()
+        }) for recipe in recipes
+    )
+
+
+def order_by_score(queryset, ordering):
+    """
+    Сортирует рецепты по рейтингу ORDERINGS[ordering] по убыванию.
+    Внутреннее соединение с RecipeScore позволяет читать рецепты по
+    индексу рейтинга. Строка RecipeScore создаётся вместе с рецептом
+    (create_scores), для рецептов, созданных в обход сигналов, её
+    заполняет update_recipe_scores --full.
+    """
+
+    field = ORDERINGS[ordering]
+    return queryset.filter(**{f'score__{field}__isnull': False}).order_by(
+        F(f'score__{field}').desc(), '-id'
+    )
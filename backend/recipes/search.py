@@ -0,0 +1,165 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from .models import Recipe
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+WORD = re.compile(r'\w+')
+# ни словарь russian, ни unicode61 не приравнивают ё к е, поэтому
+# ё заменяется на е и в индексе, и в запросе
+YO = str.maketrans('ёЁ', 'еЕ')
+
+POSTGRESQL_SETUP = (
+    f"""
+    CREATE OR REPLACE FUNCTION recipes_recipe_search_vector()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector(
+                '{SEARCH_CONFIG}',
+                translate(coalesce(NEW.name, ''), 'ёЁ', 'еЕ')
+            ), 'A')
+            || setweight(to_tsvector(
+                '{SEARCH_CONFIG}',
+                translate(coalesce(NEW.text, ''), 'ёЁ', 'еЕ')
+            ), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_vector ON recipes_recipe',
+    """
+    CREATE TRIGGER recipes_recipe_search_vector
+    BEFORE INSERT OR UPDATE OF name, text, search_vector ON recipes_recipe
+    FOR EACH ROW EXECUTE PROCEDURE recipes_recipe_search_vector()
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS recipe_search_vector_idx
+    ON recipes_recipe USING gin (search_vector)
+    """,
+    """
+    UPDATE recipes_recipe SET search_vector = NULL
+    WHERE search_vector IS NULL
+    """,
+)
+
+
+def _fts_values(row):
+    """Название и описание строки row для таблицы FTS5."""
+
+    return ', '.join(
+        f"replace(replace({row}.{column}, 'ё', 'е'), 'Ё', 'Е')"
+        for column in ('name', 'text')
+    )
+
+
+FTS_INSERT = (
+    f'INSERT INTO {FTS_TABLE}(rowid, name, text) '
+    f'VALUES (new.id, {_fts_values("new")});'
+)
+FTS_DELETE = (
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text) '
+    f"VALUES ('delete', old.id, {_fts_values('old')});"
+)
+
+SQLITE_SETUP = (
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, text, content='', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON recipes_recipe
+    BEGIN {FTS_INSERT} END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON recipes_recipe
+    BEGIN {FTS_DELETE} END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update
+    AFTER UPDATE OF name, text ON recipes_recipe
+    BEGIN {FTS_DELETE} {FTS_INSERT} END
+    """,
+    f'INSERT INTO {FTS_TABLE}(rowid, name, text) '
+    f'SELECT id, {_fts_values("recipes_recipe")} FROM recipes_recipe',
+)
+
+
+def install_search(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Создаёт в БД объекты полнотекстового поиска, которые нельзя описать
+    в модели: в PostgreSQL - триггер, поддерживающий Recipe.search_vector,
+    и GIN индекс; в SQLite - таблицу FTS5 с триггерами. Вызывается после
+    migrate, повторный вызов ничего не меняет.
+    """
+
+    database = connections[using]
+    if database.vendor == 'postgresql':
+        statements = POSTGRESQL_SETUP
+    elif (
+        database.vendor == 'sqlite'
+        and FTS_TABLE not in database.introspection.table_names()
+    ):
+        statements = SQLITE_SETUP
+    else:
+        return
+    with database.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def get_words(query):
+    return WORD.findall(query.lower())
+
+
+def search_recipes(queryset, query):
+    """
+    Отбирает рецепты по поисковому запросу в названии и описании и
+    сортирует по релевантности (аннотация search_rank), совпадения в
+    названии весят больше. PostgreSQL ищет по Recipe.search_vector с
+    русской морфологией и синтаксисом websearch_to_tsquery, SQLite -
+    по таблице FTS5 словами с префиксным совпадением, другие БД -
+    через icontains.
+    """
+
+    query = query.translate(YO)
+    words = get_words(query)
+    if not words:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        queryset = queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        )
+    elif connection.vendor == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in words)
+        queryset = queryset.extra(
+            select={'search_rank': f'-bm25({FTS_TABLE}, 4.0, 1.0)'},
+            tables=(FTS_TABLE,),
+            where=(
+                f'{FTS_TABLE} MATCH %s',
+                f'{FTS_TABLE}.rowid = {Recipe._meta.db_table}.id'
+            ),
+            params=(match,)
+        )
+    else:
+        in_name = Q()
+        in_text = Q()
+        for word in words:
+            in_name &= Q(name__icontains=word)
+            in_text &= Q(text__icontains=word)
+        queryset = queryset.filter(in_name | in_text).annotate(
+            search_rank=Case(
+                When(in_name, then=Value(1.0)),
+                default=Value(0.4),
+                output_field=FloatField()
+            )
+        )
+    return queryset.order_by('-search_rank', '-id')
@@ -0,0 +1,198 @@
+from contextlib import contextmanager
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import IngredientMount, ShoppingCart, ShoppingListItem
+
+GLOBAL_VERSION_KEY = 'shopping_list_version'
+USER_VERSION_KEY = 'shopping_list_version:{user_id}'
+CONTENT_KEY = 'shopping_list:{user_id}:{version}:{format}'
+
+
+def get_shopping_list(user):
+    """
+    Возвращает агрегированный список покупок пользователя:
+    кортежи (название, единица измерения, общее количество).
+    """
+
+    return ShoppingListItem.objects.filter(
+        user=user
+    ).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'total_amount'
+    ).order_by(
+        'ingredient__name'
+    )
+
+
+def aggregate_shopping_lists(user_ids=None):
+    """
+    Считает списки покупок заново по IngredientMount и ShoppingCart.
+    Возвращает словарь {(user_id, ingredient_id): total_amount}.
+    """
+
+    # одно условие на корзину: второй filter() по многозначной связи
+    # добавил бы второй JOIN и умножил суммы на число корзин с рецептом
+    if user_ids is None:
+        queryset = IngredientMount.objects.filter(
+            recipe__shopping_cart__isnull=False
+        )
+    else:
+        queryset = IngredientMount.objects.filter(
+            recipe__shopping_cart__user__in=user_ids
+        )
+    rows = queryset.values_list(
+        'recipe__shopping_cart__user', 'ingredient'
+    ).order_by().annotate(total=Sum('amount'))
+    return {(user_id, ingredient_id): total
+            for user_id, ingredient_id, total in rows}
+
+
+def apply_shopping_list_deltas(user_ids, deltas):
+    """
+    Прибавляет deltas {ingredient_id: количество} к спискам покупок
+    пользователей user_ids. Строки с нулевым количеством удаляются.
+    """
+
+    user_ids = list(user_ids)
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not user_ids or not deltas:
+        return
+    with transaction.atomic():
+        ShoppingListItem.objects.bulk_create(
+            [ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+             for user_id in user_ids for ingredient_id in deltas],
+            ignore_conflicts=True
+        )
+        items = ShoppingListItem.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=deltas
+        )
+        items.update(total_amount=F('total_amount') + Case(
+            *[When(ingredient_id=ingredient_id, then=Value(delta))
+              for ingredient_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        ))
+        items.filter(total_amount__lte=0).delete()
+
+
+def get_recipe_amounts(recipe_id):
+    return dict(IngredientMount.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('ingredient_id', 'amount'))
+
+
+def add_recipe_to_shopping_list(user_id, recipe_id):
+    apply_shopping_list_deltas([user_id], get_recipe_amounts(recipe_id))
+
+
+def remove_recipe_from_shopping_list(user_id, recipe_id):
+    apply_shopping_list_deltas([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in get_recipe_amounts(recipe_id).items()
+    })
+
+
+def change_recipe_amounts(recipe_id, old_amounts, new_amounts):
+    """
+    Переносит изменение ингредиентов рецепта в списки покупок всех
+    пользователей, у которых рецепт в корзине.
+    """
+
+    deltas = {
+        ingredient_id: (
+            new_amounts.get(ingredient_id, 0)
+            - old_amounts.get(ingredient_id, 0)
+        )
+        for ingredient_id in set(old_amounts) | set(new_amounts)
+    }
+    apply_shopping_list_deltas(ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True), deltas)
+
+
+@contextmanager
+def track_recipe_amounts(recipe_ids):
+    """
+    Переносит в списки покупок изменения ингредиентов рецептов
+    recipe_ids, сделанные внутри блока сохранением и удалением
+    отдельных IngredientMount, например в админке.
+    """
+
+    old = {
+        recipe_id: get_recipe_amounts(recipe_id)
+        for recipe_id in set(recipe_ids)
+    }
+    yield
+    for recipe_id, old_amounts in old.items():
+        new_amounts = get_recipe_amounts(recipe_id)
+        if new_amounts != old_amounts:
+            change_recipe_amounts(recipe_id, old_amounts, new_amounts)
+
+
+def _get_version(key):
+    return cache.get_or_set(key, lambda: uuid4().hex, None)
+
+
+def _bump_version(key):
+    cache.set(key, uuid4().hex, None)
+
+
+def get_version(user_id):
+    """
+    Версия списка покупок пользователя. Меняется при любом изменении
+    его корзины, ингредиентов рецептов в корзине или справочника
+    ингредиентов.
+    """
+
+    return '{}.{}'.format(
+        _get_version(GLOBAL_VERSION_KEY),
+        _get_version(USER_VERSION_KEY.format(user_id=user_id))
+    )
+
+
+def bump_user_version(*user_ids):
+    for user_id in set(user_ids):
+        _bump_version(USER_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_recipe_version(recipe_id):
+    """Сбрасывает версии всех пользователей, у которых рецепт в корзине."""
+
+    bump_user_version(*ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True))
+
+
+def bump_global_version():
+    _bump_version(GLOBAL_VERSION_KEY)
+
+
+def _cache_chunks(key, chunks):
+    content = []
+    for chunk in chunks:
+        content.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(content), settings.SHOPPING_LIST_CACHE_TIMEOUT)
+
+
+def export_shopping_list(user, exporter):
+    """
+    Возвращает итератор байтов файла со списком покупок в формате
+    exporter. Готовый файл кэшируется до изменения версии списка, поэтому
+    повторная выгрузка не обращается к БД за агрегацией.
+    """
+
+    key = CONTENT_KEY.format(
+        user_id=user.id,
+        version=get_version(user.id),
+        format=exporter.format
+    )
+    content = cache.get(key)
+    if content is not None:
+        return iter([content])
+    rows = get_shopping_list(user).iterator()
+    return _cache_chunks(key, exporter.render(rows))
@@ -0,0 +1,167 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from users.models import User
+
+from .counters import change_counter
+from .feed import fan_out_recipes, schedule
+from .images import delete_thumbnails, schedule_thumbnails
+from .ingredient_sets import log_recipe_change, log_recipe_changes
+from .models import (Favorite, Ingredient, IngredientMount, Recipe,
+                     ShoppingCart, Tag)
+from .scores import create_scores
+from .shopping_list import (add_recipe_to_shopping_list, bump_global_version,
+                            bump_recipe_version, bump_user_version,
+                            change_recipe_amounts,
+                            remove_recipe_from_shopping_list)
+from .versions import bump_table_version, touch
+
+# Отправляется после обновления рецепта через API. Аргументы:
+# instance - рецепт, changes - словарь изменений вида
+# {'fields': [...], 'tags': {'added', 'removed'},
+#  'ingredients': {'added': {id: amount}, 'updated': {id: (old, new)},
+#                  'removed': {id: amount}}}.
+recipe_updated = Signal()
+# Отправляется после создания рецептов через bulk_create, который не
+# отправляет post_save. Аргументы: instances - сохранённые рецепты с id.
+recipes_created = Signal()
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_saved(sender, instance, created, **kwargs):
+    if created:
+        add_recipe_to_shopping_list(instance.user_id, instance.recipe_id)
+        change_counter(
+            Recipe, instance.recipe_id, 'in_carts_count', 1,
+            updated_at=timezone.now()
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_cart_deleting(sender, instance, **kwargs):
+    """
+    Вычитает рецепт из списка покупок до удаления. pre_delete отправляется
+    до каскадного удаления IngredientMount, поэтому при удалении рецепта
+    его ингредиенты ещё доступны.
+    """
+
+    remove_recipe_from_shopping_list(instance.user_id, instance.recipe_id)
+    change_counter(
+        Recipe, instance.recipe_id, 'in_carts_count', -1,
+        updated_at=timezone.now()
+    )
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=IngredientMount)
+def ingredient_mount_changed(sender, instance, **kwargs):
+    bump_recipe_version(instance.recipe_id)
+    bump_table_version(IngredientMount)
+    log_recipe_change(instance.recipe_id)
+
+
+def _created_side_effects(recipes):
+    """
+    Счётчики авторов, журнал наборов ингредиентов, ленты подписчиков и
+    рейтинги новых рецептов: по одному запросу на автора или на пачку.
+    """
+
+    authors = Counter(recipe.author_id for recipe in recipes)
+    for author_id, count in authors.items():
+        change_counter(User, author_id, 'recipes_count', count)
+    recipe_ids = [recipe.id for recipe in recipes]
+    log_recipe_changes(recipe_ids)
+    schedule(fan_out_recipes, recipe_ids)
+    create_scores(recipes)
+
+
+def _schedule_stale_thumbnails(recipe):
+    if (
+        recipe.image
+        and recipe.image.name != recipe.image_thumbnails.get('source')
+    ):
+        schedule_thumbnails(recipe.id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        _created_side_effects([instance])
+    bump_table_version(Recipe)
+    _schedule_stale_thumbnails(instance)
+
+
+@receiver(recipes_created, sender=Recipe)
+def recipes_bulk_created(sender, instances, **kwargs):
+    _created_side_effects(instances)
+    bump_table_version(Recipe)
+    for instance in instances:
+        _schedule_stale_thumbnails(instance)
+
+
+@receiver(recipe_updated, sender=Recipe)
+def recipe_ingredients_updated(sender, instance, changes, **kwargs):
+    """Переносит изменение ингредиентов рецепта в списки покупок."""
+
+    ingredients = changes.get('ingredients')
+    if not ingredients or not any(ingredients.values()):
+        return
+    old_amounts = dict(ingredients['removed'])
+    new_amounts = dict(ingredients['added'])
+    for ingredient_id, (old, new) in ingredients['updated'].items():
+        old_amounts[ingredient_id] = old
+        new_amounts[ingredient_id] = new
+    change_recipe_amounts(instance.id, old_amounts, new_amounts)
+    bump_recipe_version(instance.id)
+    bump_table_version(IngredientMount)
+    if ingredients['added'] or ingredients['removed']:
+        log_recipe_change(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+    bump_table_version(Recipe)
+    log_recipe_change(instance.id)
+    delete_thumbnails(instance.image_thumbnails)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipe, instance.recipe_id, 'favorites_count', 1,
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    change_counter(
+        Recipe, instance.recipe_id, 'favorites_count', -1,
+        updated_at=timezone.now()
+    )
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def user_relations_changed(sender, instance, **kwargs):
+    touch(User, 'relations_updated_at', pk=instance.user_id)
+    bump_table_version(sender)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    bump_global_version()
+    bump_table_version(Ingredient)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    bump_table_version(Tag)
@@ -0,0 +1,152 @@
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from users.models import Follow, User
+
+from .ingredient_sets import reset_index
+from .models import (Favorite, Ingredient, IngredientMount, Recipe,
+                     ShoppingCart, Tag)
+from .versions import bump_table_version
+
+PREFIX = 'synthetic'
+PASSWORD = 'synthetic-password'
+TAGS = (
+    ('Завтрак', 'breakfast', '#FFA500'),
+    ('Обед', 'lunch', '#00FF00'),
+    ('Ужин', 'dinner', '#A020F0'),
+    ('Десерт', 'dessert', '#FF0000'),
+    ('Перекус', 'snack', '#0000FF'),
+)
+
+
+def _created_ids(model, start_id):
+    """
+    id объектов, созданных bulk_create после start_id. Нужно для БД,
+    которые не возвращают id из bulk_create.
+    """
+
+    return list(model.objects.filter(
+        id__gt=start_id
+    ).order_by('id').values_list('id', flat=True))
+
+
+def _last_id(model):
+    return model.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+
+
+def _sample_pairs(randomizer, left, right, per_item):
+    for item in left:
+        for other in randomizer.sample(right, min(per_item, len(right))):
+            yield item, other
+
+
+def seed_dataset(
+    users=100, recipes=1000, follows=10, favorites=20, carts=5,
+    ingredients_path=None, seed=0, batch_size=2000, stdout=None
+):
+    """
+    Заполняет БД синтетическими данными через bulk_create: пользователи,
+    подписки, рецепты с 5-30 ингредиентами и 1-3 тэгами, избранное и
+    списки покупок. Сигналы при bulk_create не отправляются, поэтому
+    затем пересчитываются счётчики, списки покупок, ленты подписок и
+    рейтинги рецептов.
+    Возвращает словарь с количеством созданных объектов.
+    """
+
+    randomizer = random.Random(seed)
+    if not Ingredient.objects.exists():
+        call_command(
+            'load_ingredients',
+            ingredients_path or str(
+                settings.BASE_DIR.parent / 'data' / 'ingredients.csv'
+            ),
+            stdout=stdout
+        )
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    Tag.objects.bulk_create(
+        (Tag(name=name, slug=slug, color=color)
+         for name, slug, color in TAGS),
+        ignore_conflicts=True
+    )
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+    start_id = _last_id(User)
+    password = make_password(PASSWORD)
+    User.objects.bulk_create((
+        User(
+            username=f'{PREFIX}_{start_id + number}',
+            email=f'{PREFIX}_{start_id + number}@example.com',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=password
+        ) for number in range(users)
+    ), batch_size=batch_size)
+    user_ids = _created_ids(User, start_id)
+
+    Follow.objects.bulk_create((
+        Follow(user_id=user, following_id=following)
+        for user, following in _sample_pairs(
+            randomizer, user_ids, user_ids, follows
+        ) if user != following
+    ), batch_size=batch_size, ignore_conflicts=True)
+
+    recipe_ids = []
+    for start in range(0, recipes, batch_size):
+        start_id = _last_id(Recipe)
+        Recipe.objects.bulk_create(
+            Recipe(
+                author_id=randomizer.choice(user_ids),
+                name=f'{PREFIX} рецепт {start + number}',
+                text='Синтетический рецепт',
+                image='recipes/synthetic.jpg',
+                cooking_time=randomizer.randint(1, 180)
+            ) for number in range(min(batch_size, recipes - start))
+        )
+        batch_ids = _created_ids(Recipe, start_id)
+        recipe_ids.extend(batch_ids)
+        IngredientMount.objects.bulk_create((
+            IngredientMount(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=randomizer.randint(1, 500)
+            )
+            for recipe_id in batch_ids
+            for ingredient_id in randomizer.sample(
+                ingredient_ids, min(randomizer.randint(5, 30),
+                                    len(ingredient_ids))
+            )
+        ), batch_size=batch_size)
+        Recipe.tags.through.objects.bulk_create((
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in batch_ids
+            for tag_id in randomizer.sample(
+                tag_ids, randomizer.randint(1, min(3, len(tag_ids)))
+            )
+        ), batch_size=batch_size)
+
+    for model, per_user in ((Favorite, favorites), (ShoppingCart, carts)):
+        model.objects.bulk_create((
+            model(user_id=user, recipe_id=recipe)
+            for user, recipe in _sample_pairs(
+                randomizer, user_ids, recipe_ids, per_user
+            )
+        ), batch_size=batch_size, ignore_conflicts=True)
+
+    call_command('reconcile_counters', stdout=stdout)
+    call_command('rebuild_shopping_lists', stdout=stdout)
+    call_command('rebuild_feeds', stdout=stdout)
+    call_command('update_recipe_scores', full=True, stdout=stdout)
+    for model in (Follow, Recipe, Favorite, ShoppingCart, Tag):
+        bump_table_version(model)
+    reset_index()
+    return {
+        'users': len(user_ids),
+        'recipes': len(recipe_ids),
+        'follows_per_user': follows,
+        'favorites_per_user': favorites,
+        'carts_per_user': carts,
+    }
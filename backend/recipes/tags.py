@@ -0,0 +1,53 @@
+import threading
+
+from django.db.models import Count, Exists, OuterRef
+
+from .models import Recipe, Tag
+from .versions import get_table_version
+
+_lock = threading.Lock()
+_tag_map = None
+_tag_map_version = None
+
+
+def _rebuild_tag_map(version):
+    global _tag_map, _tag_map_version
+    with _lock:
+        if _tag_map_version != version:
+            _tag_map = dict(Tag.objects.values_list('slug', 'id'))
+            _tag_map_version = version
+
+
+def get_tag_map():
+    """
+    Возвращает словарь {slug: id} всех тэгов. Словарь хранится в памяти
+    процесса и перестраивается после изменения модели Tag.
+    """
+
+    version, _ = get_table_version(Tag)
+    if _tag_map_version != version:
+        _rebuild_tag_map(version)
+    return _tag_map
+
+
+def filter_by_tags(queryset, slugs, match_all=False, tag_map=None):
+    """
+    Отбирает рецепты с любым (или, при match_all, со всеми) из тэгов slugs
+    одним подзапросом EXISTS, без JOIN и DISTINCT по рецептам.
+    Неизвестные слаги пропускаются в режиме любого тэга и дают пустой
+    результат в режиме всех тэгов. По умолчанию используется get_tag_map.
+    """
+
+    if tag_map is None:
+        tag_map = get_tag_map()
+    tag_ids = {tag_map[slug] for slug in slugs if slug in tag_map}
+    if not tag_ids or (match_all and len(tag_ids) < len(set(slugs))):
+        return queryset.none()
+    recipe_tags = Recipe.tags.through.objects.filter(
+        recipe=OuterRef('pk'), tag_id__in=tag_ids
+    )
+    if match_all and len(tag_ids) > 1:
+        recipe_tags = recipe_tags.order_by().values('recipe').annotate(
+            tags_count=Count('tag_id')
+        ).filter(tags_count=len(tag_ids))
+    return queryset.filter(Exists(recipe_tags))
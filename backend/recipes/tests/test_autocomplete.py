@@ -0,0 +1,27 @@
+from django.test import TestCase
+from recipes.autocomplete import IngredientIndex, search_in_database
+from recipes.models import Ingredient
+
+
+class IngredientSearchTests(TestCase):
+    """Поиск ингредиентов в индексе в памяти и в БД."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('мука пшеничная', 'мука ржаная', 'мускатный орех',
+                     'овсяная мука'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def test_database_search_by_prefix(self):
+        self.assertEqual(
+            [ingredient.name for ingredient in search_in_database('мук', 10)],
+            ['мука пшеничная', 'мука ржаная']
+        )
+        self.assertEqual(len(search_in_database('му', 2)), 2)
+
+    def test_index_search_by_prefix_then_substring(self):
+        index = IngredientIndex(Ingredient.objects.all())
+        self.assertEqual(
+            [ingredient.name for ingredient in index.search('мук', 10)],
+            ['мука пшеничная', 'мука ржаная', 'овсяная мука']
+        )
@@ -0,0 +1,99 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+from recipes.ingredient_sets import (RecipeIngredientIndex,
+                                     filter_by_ingredients, load_rows)
+from recipes.models import Ingredient, IngredientMount, Recipe
+from users.models import User
+
+
+class RecipeIngredientIndexTests(SimpleTestCase):
+    """Ранжирование и изменение индекса ингредиентов рецептов."""
+
+    rows = [(1, 10), (1, 11), (2, 10), (3, 11), (3, 12)]
+
+    def setUp(self):
+        self.index = RecipeIngredientIndex(self.rows, 'generation', 1)
+
+    def test_match_orders_by_missing_ingredients(self):
+        self.assertEqual(
+            self.index.match([10, 11], 10), [(2, 0), (1, 0), (3, 1)]
+        )
+        self.assertEqual(self.index.match([10, 11], 1), [(2, 0)])
+
+    def test_ranked_is_lazy(self):
+        ranked = self.index.ranked([10, 11])
+        self.assertEqual(next(ranked), (2, 0))
+        self.assertEqual(list(ranked), [(1, 0), (3, 1)])
+
+    def test_copy_does_not_change_original(self):
+        postings = self.index.postings[10]
+        changed = self.index.copy('generation', 2)
+        changed.update(1, [12])
+        changed.update(2, [])
+        changed.update(4, [10])
+        self.assertEqual(
+            self.index.match([10, 11], 10), [(2, 0), (1, 0), (3, 1)]
+        )
+        self.assertIs(self.index.postings[10], postings)
+        self.assertEqual(list(postings), [1, 2])
+        self.assertEqual(self.index.sequence, 1)
+        self.assertEqual(
+            changed.match([10, 12], 10), [(4, 0), (1, 0), (3, 1)]
+        )
+        self.assertEqual(changed.sequence, 2)
+        self.assertEqual(len(changed), 3)
+
+
+class FilterByIngredientsTests(TestCase):
+    """Отбор рецептов ?have= вместе с другими фильтрами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@example.com'
+            ) for number in range(2)
+        ]
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.recipes = []
+        for author in cls.authors:
+            recipe = Recipe.objects.create(
+                author=author, name='блины', text='блины',
+                image='recipes/test.jpg', cooking_time=10
+            )
+            IngredientMount.objects.create(
+                recipe=recipe, ingredient=cls.ingredient, amount=5
+            )
+            cls.recipes.append(recipe)
+
+    @override_settings(RECIPES_HAVE_LIMIT=1)
+    def test_limit_applies_after_other_filters(self):
+        index = RecipeIngredientIndex(load_rows())
+        queryset = Recipe.objects.filter(author=self.authors[0])
+        self.assertEqual(
+            list(filter_by_ingredients(
+                queryset, [self.ingredient.id], index
+            )),
+            [self.recipes[0]]
+        )
+        self.assertEqual(
+            list(filter_by_ingredients(
+                Recipe.objects.all(), [self.ingredient.id], index
+            )),
+            [self.recipes[1]]
+        )
+
+    @override_settings(RECIPES_HAVE_BATCH_SIZE=1)
+    def test_keeps_queryset_order_for_equal_missing(self):
+        index = RecipeIngredientIndex(load_rows())
+        queryset = Recipe.objects.filter(
+            id__in=[recipe.id for recipe in self.recipes]
+        ).order_by('id')
+        self.assertEqual(
+            list(filter_by_ingredients(
+                queryset, [self.ingredient.id], index
+            )),
+            self.recipes
+        )
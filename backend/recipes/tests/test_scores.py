@@ -0,0 +1,112 @@
+import math
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from recipes.models import Favorite, Recipe, RecipeScore, ShoppingCart
+from recipes.scores import (NO_SCORE, event_terms, get_rates, log_sum_exp,
+                            order_by_score, update_scores)
+from users.models import Follow, User
+
+
+class RecipeScoreTests(TestCase):
+    """Пересчёт рейтингов рецептов и сортировка по ним."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.users = [
+            User.objects.create(
+                username=f'user{number}', email=f'user{number}@example.com'
+            ) for number in range(4)
+        ]
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.users[number % 2], name=f'рецепт {number}',
+                text='рецепт', image='recipes/test.jpg', cooking_time=10
+            ) for number in range(4)
+        ]
+        for number, user in enumerate(cls.users):
+            Favorite.objects.create(
+                user=user, recipe=cls.recipes[0],
+                created_at=now - timedelta(hours=number * 10)
+            )
+            ShoppingCart.objects.create(
+                user=user, recipe=cls.recipes[number % 2],
+                created_at=now - timedelta(days=number * 5)
+            )
+        for user in cls.users[2:]:
+            Follow.objects.create(user=user, following=cls.users[1])
+
+    def expected_scores(self, recipe):
+        """Рейтинги рецепта, посчитанные по событиям в Python."""
+
+        rates = get_rates()
+        events = [
+            ('created', [recipe.created_at]),
+            ('favorite', Favorite.objects.filter(
+                recipe=recipe
+            ).values_list('created_at', flat=True)),
+            ('cart', ShoppingCart.objects.filter(
+                recipe=recipe
+            ).values_list('created_at', flat=True)),
+            ('follow', Follow.objects.filter(
+                following=recipe.author
+            ).values_list('created_at', flat=True)),
+        ]
+        terms = {field: [] for field in rates}
+        for kind, moments in events:
+            for field, values in event_terms(kind, moments, rates).items():
+                terms[field].extend(values)
+        return {field: log_sum_exp(terms[field]) for field in rates}
+
+    def assert_scores(self):
+        for recipe in self.recipes:
+            score = RecipeScore.objects.get(recipe=recipe)
+            for field, value in self.expected_scores(recipe).items():
+                with self.subTest(recipe=recipe.id, field=field):
+                    self.assertAlmostEqual(
+                        getattr(score, field), value, places=6
+                    )
+
+    def test_full_update_matches_events(self):
+        self.assertEqual(update_scores(full=True), len(self.recipes))
+        self.assert_scores()
+
+    def test_update_only_changed_recipes(self):
+        update_scores(full=True)
+        Recipe.objects.filter(id=self.recipes[3].id).update(
+            updated_at=timezone.now() + timedelta(minutes=1)
+        )
+        Favorite.objects.create(user=self.users[1], recipe=self.recipes[3])
+        self.assertEqual(update_scores(), 1)
+        self.assert_scores()
+
+    def test_update_recipes_of_followed_author(self):
+        update_scores(full=True)
+        Follow.objects.create(user=self.users[1], following=self.users[0])
+        self.assertEqual(update_scores(), 2)
+        self.assert_scores()
+
+    @override_settings(RECIPE_SCORE_WEIGHTS={
+        'created': 0, 'favorite': 3, 'cart': 0, 'follow': -1
+    })
+    def test_non_positive_weights_are_skipped(self):
+        update_scores(full=True)
+        self.assert_scores()
+        self.assertEqual(
+            RecipeScore.objects.get(recipe=self.recipes[3]).popular,
+            NO_SCORE
+        )
+
+    def test_new_recipes_have_scores(self):
+        ordered = list(order_by_score(Recipe.objects.all(), 'trending'))
+        self.assertEqual(len(ordered), len(self.recipes))
+        self.assertTrue(math.isfinite(ordered[0].score.trending))
+
+    def test_full_update_creates_missing_scores(self):
+        RecipeScore.objects.filter(recipe=self.recipes[0]).delete()
+        update_scores(full=True)
+        ordered = list(order_by_score(Recipe.objects.all(), 'popular'))
+        self.assertEqual(len(ordered), len(self.recipes))
+        self.assertEqual(ordered[0], self.recipes[0])
@@ -0,0 +1,54 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+class SearchVectorLoadingTests(TestCase):
+    """Recipe.search_vector не загружается вместе с рецептами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.admin, name='блины', text='блины',
+            image='recipes/test.jpg', cooking_time=10
+        )
+        Favorite.objects.create(user=cls.admin, recipe=cls.recipe)
+
+    def assert_not_loaded(self, load):
+        with CaptureQueriesContext(connection) as context:
+            load()
+        self.assertTrue(context.captured_queries)
+        for query in context.captured_queries:
+            self.assertNotIn('search_vector', query['sql'])
+
+    def test_querysets_and_relations(self):
+        favorite = Favorite.objects.get()
+        self.assert_not_loaded(lambda: Recipe.objects.get())
+        self.assert_not_loaded(lambda: favorite.recipe)
+        self.assert_not_loaded(lambda: list(self.admin.recipes.all()))
+
+    def test_api_and_admin(self):
+        self.client.force_login(self.admin)
+        for url in (
+            '/api/recipes/', f'/api/recipes/{self.recipe.id}/',
+            '/admin/recipes/recipe/', '/admin/recipes/favorite/',
+            f'/admin/recipes/recipe/{self.recipe.id}/change/',
+        ):
+            with self.subTest(url=url):
+                self.assert_not_loaded(
+                    lambda: self.assertEqual(
+                        self.client.get(url).status_code, 200
+                    )
+                )
+
+    def test_save_keeps_deferred_field(self):
+        recipe = Recipe.objects.get()
+        recipe.name = 'оладьи'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'оладьи')
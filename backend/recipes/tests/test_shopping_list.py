@@ -0,0 +1,138 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import (Ingredient, IngredientMount, Recipe, ShoppingCart,
+                            ShoppingListItem, Tag)
+from recipes.shopping_list import aggregate_shopping_lists
+from users.models import User
+
+
+class AggregateShoppingListsTests(TestCase):
+    """Пересчёт списков покупок по IngredientMount и ShoppingCart."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(
+                username=f'user{number}', email=f'user{number}@example.com'
+            ) for number in range(3)
+        ]
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.users[0], name='блины', text='блины',
+            image='recipes/test.jpg', cooking_time=10
+        )
+        IngredientMount.objects.create(
+            recipe=cls.recipe, ingredient=cls.ingredient, amount=5
+        )
+        for user in cls.users:
+            ShoppingCart.objects.create(user=user, recipe=cls.recipe)
+
+    def test_recipe_in_several_carts(self):
+        expected = {
+            (user.id, self.ingredient.id): 5 for user in self.users
+        }
+        self.assertEqual(aggregate_shopping_lists(), expected)
+
+    def test_filter_by_user_does_not_multiply_amounts(self):
+        user = self.users[1]
+        self.assertEqual(
+            aggregate_shopping_lists([user.id]),
+            {(user.id, self.ingredient.id): 5}
+        )
+
+    def test_rebuild_for_user_keeps_correct_rows(self):
+        user = self.users[2]
+        call_command(
+            'rebuild_shopping_lists', '--user', str(user.id),
+            stdout=StringIO()
+        )
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=user).total_amount, 5
+        )
+        call_command('rebuild_shopping_lists', '--verify', stdout=StringIO())
+
+
+class AdminIngredientChangesTests(TestCase):
+    """Правка ингредиентов рецепта в админке меняет списки покупок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.users = [
+            User.objects.create(
+                username=f'user{number}', email=f'user{number}@example.com'
+            ) for number in range(2)
+        ]
+        cls.flour, cls.milk = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('мука', 'молоко')
+        )
+        cls.tag = Tag.objects.create(
+            name='завтрак', slug='breakfast', color='#FF0000'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.admin, name='блины', text='блины',
+            image='recipes/test.jpg', cooking_time=10
+        )
+        cls.recipe.tags.set([cls.tag])
+        cls.mount = IngredientMount.objects.create(
+            recipe=cls.recipe, ingredient=cls.flour, amount=5
+        )
+        for user in cls.users:
+            ShoppingCart.objects.create(user=user, recipe=cls.recipe)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assert_lists(self, amounts):
+        expected = {
+            (user.id, ingredient.id): amount
+            for user in self.users
+            for ingredient, amount in amounts.items()
+        }
+        self.assertEqual({
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total
+            in ShoppingListItem.objects.values_list(
+                'user_id', 'ingredient_id', 'total_amount'
+            )
+        }, expected)
+        self.assertEqual(aggregate_shopping_lists(), expected)
+
+    def test_change_and_delete_ingredient_mount(self):
+        url = f'/admin/recipes/ingredientmount/{self.mount.id}/'
+        response = self.client.post(f'{url}change/', {
+            'ingredient': self.milk.id, 'recipe': self.recipe.id,
+            'amount': 7,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assert_lists({self.milk: 7})
+        response = self.client.post(f'{url}delete/', {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assert_lists({})
+
+    def test_recipe_inline(self):
+        prefix = 'recipe_ingredients'
+        response = self.client.post(
+            f'/admin/recipes/recipe/{self.recipe.id}/change/', {
+                'author': self.admin.id, 'name': 'блины', 'text': 'блины',
+                'cooking_time': 10, 'tags': [self.tag.id],
+                f'{prefix}-TOTAL_FORMS': 2,
+                f'{prefix}-INITIAL_FORMS': 1,
+                f'{prefix}-0-id': self.mount.id,
+                f'{prefix}-0-recipe': self.recipe.id,
+                f'{prefix}-0-ingredient': self.flour.id,
+                f'{prefix}-0-amount': 8,
+                f'{prefix}-1-recipe': self.recipe.id,
+                f'{prefix}-1-ingredient': self.milk.id,
+                f'{prefix}-1-amount': 3,
+            }
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assert_lists({self.flour: 8, self.milk: 3})
@@ -0,0 +1,63 @@
+import time
+from functools import partial
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+TABLE_VERSION_KEY = 'table_version:{label}'
+
+
+def _new_version():
+    return uuid4().hex, time.time()
+
+
+def get_table_versions(models):
+    """
+    Версии таблиц моделей models одним запросом к кэшу: список пар
+    (токен, время последнего изменения). Токен меняется при каждом
+    изменении таблицы.
+    """
+
+    keys = [
+        TABLE_VERSION_KEY.format(label=model._meta.label_lower)
+        for model in models
+    ]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            if not cache.add(key, version, None):
+                missing[key] = cache.get(key, version)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def get_table_version(model):
+    """Версия таблицы модели: пара (токен, время последнего изменения)."""
+
+    return get_table_versions([model])[0]
+
+
+def _set_table_version(model):
+    cache.set(
+        TABLE_VERSION_KEY.format(label=model._meta.label_lower),
+        _new_version(),
+        None
+    )
+
+
+def bump_table_version(model):
+    """
+    Меняет версию таблицы после фиксации транзакции, чтобы по новой
+    версии не закэшировались ещё не зафиксированные данные.
+    """
+
+    transaction.on_commit(partial(_set_table_version, model))
+
+
+def touch(model, field, **filters):
+    """Записывает текущее время в поле field отобранных объектов model."""
+
+    model.objects.filter(**filters).update(**{field: timezone.now()})
@@ -1,30 +1,33 @@
 from django.contrib import admin
+from foodgram.admin import LargeTableAdmin
 
 from .models import Follow, User
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = (
         'id',
         'username',
         'email',
         'first_name',
-        'last_name'
-    )
-    list_filter = (
-        'first_name',
-        'email'
+        'last_name',
+        'recipes_count',
+        'followers_count'
     )
+    list_filter = ('role',)
+    search_fields = ('^username', '^email')
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = (
         'user',
         'following'
     )
+    list_select_related = ('user', 'following')
     search_fields = (
-        'following__email',
-        'following__first_name'
+        '^following__username',
+        '^following__email'
     )
+    autocomplete_fields = ('user', 'following')
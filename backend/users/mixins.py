@@ -4,15 +4,19 @@ class CheckRequestMixin:
     def good_request(self, request):
         if not request or request.user.is_anonymous:
             return False
+        return True
 
 
 class GetIsFollowMixin:
     """
     Миксин проверяет запрос. После этого проверяет подписал ли пользователь
-    на автора.
+    на автора. Если queryset уже аннотирован полем is_subscribed,
+    дополнительный запрос к БД не выполняется.
     """
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
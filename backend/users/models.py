@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -43,6 +44,32 @@ class User(AbstractUser):
         default='USER',
         help_text='Выберите роль для пользователя'
     )
+    recipes_count = models.PositiveIntegerField(
+        'количество рецептов',
+        default=0,
+        editable=False,
+        help_text='Количество рецептов пользователя'
+    )
+    followers_count = models.PositiveIntegerField(
+        'количество подписчиков',
+        default=0,
+        editable=False,
+        help_text='Количество подписчиков пользователя'
+    )
+    feed_pull = models.BooleanField(
+        'лента чтением',
+        default=False,
+        editable=False,
+        help_text='Рецепты автора не раздаются в ленты подписчиков, '
+                  'а читаются при запросе ленты'
+    )
+    relations_updated_at = models.DateTimeField(
+        'дата изменения связей',
+        default=timezone.now,
+        editable=False,
+        help_text='Время последнего изменения избранного, списка покупок '
+                  'и подписок пользователя'
+    )
 
     class Meta:
         ordering = ['-id']
@@ -82,6 +109,12 @@ class Follow(models.Model):
         verbose_name='Автор',
         help_text='Выберите автора, на которого подписываются'
     )
+    created_at = models.DateTimeField(
+        'дата подписки',
+        default=timezone.now,
+        editable=False,
+        help_text='Время подписки на автора'
+    )
 
     class Meta:
         ordering = ['-id']
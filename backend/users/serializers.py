@@ -1,3 +1,4 @@
+from api.fields import ImageThumbnailsField
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from recipes.models import Recipe
 from rest_framework import serializers
@@ -38,7 +39,9 @@ class CustomUserSerializer(UserSerializer, GetIsFollowMixin):
             'username',
             'first_name',
             'last_name',
-            'is_subscribed'
+            'is_subscribed',
+            'recipes_count',
+            'followers_count'
         )
 
 
@@ -48,12 +51,15 @@ class FollowRecipesSerializer(serializers.ModelSerializer):
     которые созданы пользователем.
     """
 
+    image_thumbnails = ImageThumbnailsField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'image_thumbnails',
             'cooking_time'
         )
 
@@ -102,7 +108,6 @@ class FollowListSerializer(
         method_name='get_is_subscribed'
     )
     recipes = serializers.SerializerMethodField(read_only=True)
-    recipes_count = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = User
@@ -114,19 +119,20 @@ class FollowListSerializer(
             'last_name',
             'is_subscribed',
             'recipes',
-            'recipes_count'
+            'recipes_count',
+            'followers_count'
         )
 
     def get_recipes(self, obj):
         request = self.context.get('request')
         self.good_request(request)
         context = {'request': request}
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = (obj.recipes.all()[:int(recipes_limit)]
-                   if recipes_limit else obj.recipes.all())
+        if hasattr(obj, 'latest_recipes'):
+            recipes = obj.latest_recipes
+        else:
+            recipes_limit = request.query_params.get('recipes_limit')
+            recipes = (obj.recipes.all()[:int(recipes_limit)]
+                       if recipes_limit else obj.recipes.all())
         return FollowRecipesSerializer(
             recipes, many=True, context=context
         ).data
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
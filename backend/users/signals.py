@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.counters import change_counter
+from recipes.feed import backfill_follow, remove_follow, schedule
+from recipes.versions import bump_table_version, touch
+
+from .models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.following_id, 'followers_count', 1)
+        schedule(backfill_follow, instance.user_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.following_id, 'followers_count', -1)
+    remove_follow(instance.user_id, instance.following_id)
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    """Подписка меняет флаг is_subscribed только у подписчика."""
+
+    touch(User, 'relations_updated_at', pk=instance.user_id)
+    bump_table_version(Follow)
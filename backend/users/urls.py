@@ -1,11 +1,17 @@
 from django.urls import include, path, re_path
-from users.views import FollowApiView, FollowListApiView
+from rest_framework.routers import DefaultRouter
+from users.views import (CustomUserViewSet, FeedListApiView, FollowApiView,
+                         FollowListApiView)
+
+router = DefaultRouter()
+router.register('users', CustomUserViewSet, basename='user')
 
 urlpatterns = [
     path('users/subscriptions/', FollowListApiView.as_view(),
          name='subscription'),
+    path('users/feed/', FeedListApiView.as_view(), name='feed'),
     path('users/<int:id>/subscribe/', FollowApiView.as_view(),
          name='subscribe'),
-    path('', include('djoser.urls')),
+    path('', include(router.urls)),
     re_path(r'^auth/', include('djoser.urls.authtoken')),
 ]
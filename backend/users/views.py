@@ -1,4 +1,11 @@
-from api.pagination import NewPageNumberPagination
+from api.mixins import CursorPaginationMixin, RecipeQuerysetMixin
+from api.pagination import FeedCursorPagination, NewPageNumberPagination
+from api.serializers import RecipeGetSerializer
+from django.db.models import (BooleanField, Exists, OuterRef, Prefetch,
+                              Subquery, Value)
+from djoser.views import UserViewSet
+from recipes.feed import get_feed_ids
+from recipes.models import Recipe
 from rest_framework import status
 from rest_framework.generics import ListAPIView, get_object_or_404
 from rest_framework.permissions import IsAuthenticated
@@ -8,6 +15,30 @@ from users.models import Follow, User
 from users.serializers import FollowListSerializer, FollowSerializer
 
 
+class CustomUserViewSet(UserViewSet):
+    """
+    Работа с данными модели User.
+    Формирует представление данных при запросах к endpoints djoser:
+    /api/users/
+    /api/users/{id}/
+    /api/users/me/
+    Флаг is_subscribed вычисляется в запросе списка через EXISTS.
+    """
+
+    pagination_class = NewPageNumberPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField())
+            )
+        return queryset.annotate(is_subscribed=Exists(Follow.objects.filter(
+            user=user, following=OuterRef('pk')
+        )))
+
+
 class FollowApiView(APIView):
     """
     Работа с данными модели Follow.
@@ -35,23 +66,62 @@ class FollowApiView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FollowListApiView(ListAPIView):
+class FollowListApiView(CursorPaginationMixin, ListAPIView):
     """
     Работа с данными модели Follow.
     Формирует представление данных при GET запросах
     к endpoint:
     /api/users/subscriptions/
+    Поддерживает пагинацию по курсору: ?pagination=cursor.
     """
 
     permission_classes = (IsAuthenticated,)
     pagination_class = NewPageNumberPagination
+    count_models = (Follow,)
+    serializer_class = FollowListSerializer
 
-    def get(self, request):
-        user = request.user
-        queryset = User.objects.filter(following__user=user)
-        page = self.paginate_queryset(queryset)
-        serializer = FollowListSerializer(
-            page, many=True,
-            context={'request': request}
-        )
-        return self.get_paginated_response(serializer.data)
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            return int(recipes_limit)
+        return None
+
+    def get_queryset(self):
+        """
+        Возвращает авторов, на которых подписан пользователь, вместе с
+        последними recipes_limit рецептами каждого автора.
+        Ограничение применяется на стороне БД.
+        """
+
+        recipes = Recipe.objects.all()
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).order_by('-id').values('pk')[:recipes_limit]
+            ))
+        return User.objects.filter(
+            following__user=self.request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='latest_recipes')
+        ).order_by('-id')
+
+
+class FeedListApiView(RecipeQuerysetMixin, ListAPIView):
+    """
+    Лента новых рецептов авторов, на которых подписан пользователь.
+    Формирует представление данных при GET запросах к endpoint:
+    /api/users/feed/
+    Пагинация только по курсору, страница читается диапазоном индекса
+    таблицы FeedItem без COUNT(*) и OFFSET.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FeedCursorPagination
+    serializer_class = RecipeGetSerializer
+
+    def get_page_ids(self, before, limit):
+        return get_feed_ids(self.request.user.id, before, limit)